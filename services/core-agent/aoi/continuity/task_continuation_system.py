@@ -1,10 +1,67 @@
 from enum import Enum
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field
+from typing import (
+    Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+)
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-import json
+from collections import OrderedDict, deque
 import asyncio
+import contextlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
 from pathlib import Path
+from weakref import WeakValueDictionary
+
+import orjson
+
+
+logger = logging.getLogger(__name__)
+
+
+# タスク状態ファイルのシリアライズオプション
+# (ステップ単位のキャッシュを連結するためインデントなし)
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# メモリ上に保持するエラー履歴の件数(全履歴はJSONLファイルに追記)
+_ERROR_HISTORY_LIMIT = 100
+
+# 保持する復旧提案の件数(表示は最新3件)
+_RECOVERY_SUGGESTION_LIMIT = 16
+
+
+def _json_default(obj: Any) -> Any:
+    """orjsonが直接扱えない型を変換"""
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, deque):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _append_bytes(path: Path, data: bytes) -> None:
+    """ファイル末尾にバイト列を追記"""
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def _intern_error_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """エラー記録の値の種類が少ない文字列をinternして共有する"""
+    for key in ('step_id', 'error_type'):
+        value = record.get(key)
+        if isinstance(value, str):
+            record[key] = sys.intern(value)
+    return record
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """ISO形式の文字列をdatetimeに変換"""
+    return datetime.fromisoformat(value) if value else None
 
 
 class TaskStatus(Enum):
@@ -17,8 +74,24 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
 
 
+# 状態ファイルをfsyncする終了ステータス(途中経過の保存ではfsyncしない)
+_DURABLE_STATUSES = frozenset({
+    TaskStatus.COMPLETED.value,
+    TaskStatus.FAILED.value,
+    TaskStatus.CANCELLED.value,
+})
+
+
 class ErrorType(Enum):
     """エラータイプ"""
+    
+    def __new__(cls, value: str) -> "ErrorType":
+        # 宣言順の序数を index として持たせ、タプル参照に使う
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj.index = len(cls.__members__)
+        return obj
+    
     NETWORK_ERROR = "network_error"
     FILE_ERROR = "file_error"
     PERMISSION_ERROR = "permission_error"
@@ -28,7 +101,105 @@ class ErrorType(Enum):
     USER_INTERRUPTION = "user_interruption"
 
 
-@dataclass
+# 読み込み時の値 -> Enum 変換表(Enumのコンストラクタ呼び出しを省く)
+_STATUS_MAP: Dict[str, TaskStatus] = dict(TaskStatus._value2member_map_)
+_ERROR_TYPE_MAP: Dict[str, ErrorType] = dict(ErrorType._value2member_map_)
+
+# エラータイプ別の復旧提案(ErrorTypeの宣言順)
+_RECOVERY_SUGGESTIONS = (
+    # NETWORK_ERROR
+    "ネットワーク接続を確認してください。"
+    "VPNやプロキシ設定も確認してください。",
+    # FILE_ERROR
+    "ファイルパスとファイルの存在を確認してください。"
+    "ディスク容量も確認してください。",
+    # PERMISSION_ERROR
+    "ファイルやディレクトリの権限を確認してください。"
+    "管理者権限が必要な場合があります。",
+    # TIMEOUT_ERROR
+    "処理時間が長すぎます。タイムアウト設定を調整するか、"
+    "処理を分割してください。",
+    # VALIDATION_ERROR
+    "入力データの形式や値を確認してください。"
+    "必須フィールドが不足している可能性があります。",
+    # SYSTEM_ERROR
+    "システムエラーが発生しました。ログを確認し、"
+    "必要に応じてシステムを再起動してください。",
+    # USER_INTERRUPTION
+    "ユーザーによって処理が中断されました。"
+    "'継続'コマンドで作業を再開できます。",
+)
+assert len(_RECOVERY_SUGGESTIONS) == len(ErrorType)
+
+# エラー分類キーワード(上にあるものほど優先)
+_ERROR_KEYWORDS = (
+    (ErrorType.NETWORK_ERROR, 'network|connection'),
+    (ErrorType.FILE_ERROR, 'file|directory'),
+    (ErrorType.PERMISSION_ERROR, 'permission|access'),
+    (ErrorType.TIMEOUT_ERROR, 'timeout'),
+    (ErrorType.VALIDATION_ERROR, 'validation|invalid'),
+    (ErrorType.USER_INTERRUPTION, 'interrupt|cancelled'),
+)
+_ERROR_PATTERN = re.compile(
+    '|'.join(
+        f'(?P<{error_type.name}>{keywords})'
+        for error_type, keywords in _ERROR_KEYWORDS
+    ),
+    re.IGNORECASE
+)
+_ERROR_PRIORITY = {
+    error_type.name: priority
+    for priority, (error_type, _) in enumerate(_ERROR_KEYWORDS)
+}
+
+
+@dataclass(slots=True)
+class FileOpContext:
+    """ファイル操作ステップのコンテキスト"""
+    type: str = 'file_operation'
+    operation: Optional[str] = None
+    file_path: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ApiCallContext:
+    """API呼び出しステップのコンテキスト"""
+    type: str = 'api_call'
+    url: Optional[str] = None
+    method: str = 'GET'
+
+
+@dataclass(slots=True)
+class ValidationContext:
+    """バリデーションステップのコンテキスト"""
+    type: str = 'validation'
+    validation_type: Optional[str] = None
+
+
+StepContext = Union[
+    FileOpContext, ApiCallContext, ValidationContext, Dict[str, Any]
+]
+
+_STEP_CONTEXT_TYPES = {
+    'file_operation': FileOpContext,
+    'api_call': ApiCallContext,
+    'validation': ValidationContext,
+}
+
+
+def _build_step_context(context: Dict[str, Any]) -> StepContext:
+    """ステップ種別に応じた型付きコンテキストを生成"""
+    context_cls = _STEP_CONTEXT_TYPES.get(context.get('type'))
+    if context_cls is None:
+        return context
+    try:
+        return context_cls(**context)
+    except TypeError:
+        # 未知のキーを含む場合は情報を失わないよう辞書のまま保持
+        return context
+
+
+@dataclass(slots=True)
 class TaskStep:
     """タスクステップ"""
     step_id: str
@@ -40,10 +211,14 @@ class TaskStep:
     error_type: Optional[ErrorType] = None
     retry_count: int = 0
     max_retries: int = 3
-    context: Dict[str, Any] = field(default_factory=dict)
+    context: StepContext = field(default_factory=dict)
+    # 完了済みステップのシリアライズ結果(変更時に破棄)
+    _serialized: Optional[bytes] = field(
+        default=None, repr=False, compare=False
+    )
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskState:
     """タスク状態"""
     task_id: str
@@ -52,28 +227,154 @@ class TaskState:
     status: TaskStatus
     steps: List[TaskStep] = field(default_factory=list)
     current_step_index: int = 0
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
+    # 生成時刻は create_task で設定(読み込み時に無駄な datetime.now() を避ける)
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     context: Dict[str, Any] = field(default_factory=dict)
-    error_history: List[Dict[str, Any]] = field(default_factory=list)
-    recovery_suggestions: List[str] = field(default_factory=list)
+    error_history: Deque[Dict[str, Any]] = field(
+        default_factory=lambda: deque(maxlen=_ERROR_HISTORY_LIMIT)
+    )
+    recovery_suggestions: Deque[str] = field(
+        default_factory=lambda: deque(maxlen=_RECOVERY_SUGGESTION_LIMIT)
+    )
+    # 変更のたびに増えるバージョン(表示用キャッシュの判定に使用)
+    version: int = 0
+    _formatted: Optional[Tuple[Tuple[Any, ...], str]] = field(
+        default=None, repr=False, compare=False
+    )
+    
+    def touch(self, now: Optional[datetime] = None) -> None:
+        """更新日時を設定し、バージョンを進める"""
+        self.updated_at = now or datetime.now()
+        self.version += 1
+
+
+# 状態ファイルに保存するフィールド
+# (error_historyは追記専用ファイルに分離、stepsはステップ単位で連結、
+#  _で始まるものはキャッシュ)
+_STATE_FIELDS = tuple(
+    f.name for f in fields(TaskState)
+    if f.name not in ('error_history', 'steps')
+    and not f.name.startswith('_')
+)
+
+
+def _serialize_step(step: TaskStep) -> bytes:
+    """ステップをシリアライズ(完了済みステップは前回の結果を再利用)"""
+    if step._serialized is not None:
+        return step._serialized
+    data = orjson.dumps(step, default=_json_default, option=_ORJSON_OPTIONS)
+    if step.status == TaskStatus.COMPLETED:
+        step._serialized = data
+    return data
+
+
+class _TaskIndex:
+    """タスクID -> (ステータス, 更新日時) の索引(SQLite)"""
+    
+    def __init__(self, db_path: Path):
+        # 書き込みはワーカースレッドから行うため接続を共有しロックで直列化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_index ("
+            "task_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "updated_at TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_status_updated "
+            "ON task_index (status, updated_at)"
+        )
+        self._conn.commit()
+    
+    def upsert(self, task_id: str, status: str, updated_at: str) -> None:
+        """索引を更新"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO task_index (task_id, status, updated_at) "
+                "VALUES (?, ?, ?) ON CONFLICT(task_id) DO UPDATE SET "
+                "status = excluded.status, updated_at = excluded.updated_at",
+                (task_id, status, updated_at)
+            )
+            self._conn.commit()
+    
+    def query(
+            self,
+            status: Optional[str] = None,
+            limit: Optional[int] = None
+    ) -> List[str]:
+        """更新日時の新しい順にタスクIDを取得"""
+        # SQLiteでは LIMIT -1 が無制限
+        limit = -1 if limit is None else limit
+        with self._lock:
+            if status is None:
+                rows = self._conn.execute(
+                    "SELECT task_id FROM task_index "
+                    "ORDER BY updated_at DESC LIMIT ?",
+                    (limit,)
+                )
+            else:
+                rows = self._conn.execute(
+                    "SELECT task_id FROM task_index WHERE status = ? "
+                    "ORDER BY updated_at DESC LIMIT ?",
+                    (status, limit)
+                )
+            return [row[0] for row in rows]
+    
+    def task_ids(self) -> Set[str]:
+        """索引済みのタスクID"""
+        with self._lock:
+            rows = self._conn.execute("SELECT task_id FROM task_index")
+            return {row[0] for row in rows}
+    
+    def close(self) -> None:
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
 
 
 class TaskContinuationSystem:
     """作業継続システム"""
     
-    def __init__(self, state_dir: str = "./task_states"):
+    def __init__(
+            self,
+            state_dir: str = "./task_states",
+            checkpoint_interval: float = 30.0,
+            max_concurrent_tasks: int = 10,
+            max_active_tasks: int = 100
+    ):
         self.state_dir = Path(state_dir)
         self.state_dir.mkdir(exist_ok=True)
-        self.active_tasks: Dict[str, TaskState] = {}
-        self.error_handlers: Dict[ErrorType, callable] = {
-            ErrorType.NETWORK_ERROR: self._handle_network_error,
-            ErrorType.FILE_ERROR: self._handle_file_error,
-            ErrorType.PERMISSION_ERROR: self._handle_permission_error,
-            ErrorType.TIMEOUT_ERROR: self._handle_timeout_error,
-            ErrorType.VALIDATION_ERROR: self._handle_validation_error,
-            ErrorType.SYSTEM_ERROR: self._handle_system_error,
-            ErrorType.USER_INTERRUPTION: self._handle_user_interruption,
+        # メモリ上のタスク(LRU、超過分は保存済みのものから破棄)
+        self.max_active_tasks = max_active_tasks
+        self.active_tasks: "OrderedDict[str, TaskState]" = OrderedDict()
+        # 書き込み遅延(write-behind)用の未保存タスクと定期フラッシュ
+        self.checkpoint_interval = checkpoint_interval
+        self._dirty: Dict[str, TaskState] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # 同時に実行するタスク数の上限
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self._exec_sem = asyncio.Semaphore(max_concurrent_tasks)
+        # タスクごとのロック(使用中のものだけ保持される)
+        self._task_locks: "WeakValueDictionary[str, asyncio.Lock]" = (
+            WeakValueDictionary()
+        )
+        # タスクごとの保存ロックと書き込み中のスレッド処理
+        # (チェックポイントと最終保存が追い越し合わないよう直列化する)
+        self._save_locks: "WeakValueDictionary[str, asyncio.Lock]" = (
+            WeakValueDictionary()
+        )
+        self._writes: Dict[str, "asyncio.Future[None]"] = {}
+        # エラータイプごとのリトライ待機(release_backoffで一斉に再開)
+        self._backoff_events: Dict[Optional[ErrorType], asyncio.Event] = {}
+        # 一覧取得用の索引(既存ファイルの取り込みは初回の一覧取得時)
+        self._index = _TaskIndex(self.state_dir / "_index.db")
+        self._index_synced = False
+        self._step_executors = {
+            FileOpContext: self._execute_file_operation,
+            ApiCallContext: self._execute_api_call,
+            ValidationContext: self._execute_validation,
         }
     
     async def create_task(
@@ -90,43 +391,77 @@ class TaskContinuationSystem:
                 description=step['description'],
                 status=TaskStatus.PENDING,
                 max_retries=step.get('max_retries', 3),
-                context=step.get('context', {})
+                context=_build_step_context(step.get('context', {}))
             )
             for step in steps
         ]
         
+        now = datetime.now()
         task_state = TaskState(
             task_id=task_id,
             title=title,
             description=description,
             status=TaskStatus.PENDING,
-            steps=task_steps
+            steps=task_steps,
+            created_at=now,
+            updated_at=now
         )
         
-        self.active_tasks[task_id] = task_state
+        self._cache_task(task_state)
         await self._save_task_state(task_state)
         return task_state
     
     async def execute_task(self, task_id: str) -> TaskState:
-        """タスクを実行"""
-        task_state = self.active_tasks.get(task_id)
+        """タスクを実行(同時実行数は max_concurrent_tasks まで)"""
+        async with self._exec_sem, self._task_lock(task_id):
+            return await self._run_task(task_id)
+    
+    async def run_many(self, task_ids: Iterable[str]) -> List[TaskState]:
+        """複数のタスクを同時実行数を制限しながら実行"""
+        scheduled: List[asyncio.Task] = []
+        pending: Set[asyncio.Task] = set()
+        
+        for task_id in task_ids:
+            # 実行待ちが上限に達したら空きが出るまで待つ
+            if len(pending) >= self.max_concurrent_tasks:
+                _, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+            task = asyncio.create_task(self.execute_task(task_id))
+            scheduled.append(task)
+            pending.add(task)
+        
+        await asyncio.gather(*pending)
+        return [task.result() for task in scheduled]
+    
+    async def _run_task(self, task_id: str) -> TaskState:
+        """タスクのステップを順に実行"""
+        task_state = self._get_active(task_id)
         if not task_state:
             task_state = await self._load_task_state(task_id)
             if not task_state:
                 raise ValueError(f"Task {task_id} not found")
+            self._cache_task(task_state)
         
         task_state.status = TaskStatus.IN_PROGRESS
-        task_state.updated_at = datetime.now()
+        task_state.touch()
         
         try:
             while task_state.current_step_index < len(task_state.steps):
+                # 一時停止・キャンセルされたらステップの区切りで止める
+                if task_state.status != TaskStatus.IN_PROGRESS:
+                    break
+                
                 current_step = task_state.steps[task_state.current_step_index]
                 
                 if current_step.status == TaskStatus.COMPLETED:
                     task_state.current_step_index += 1
                     continue
                 
-                await self._execute_step(task_state, current_step)
+                # 失敗済みのステップは下のリトライ処理で再実行する
+                if current_step.status != TaskStatus.FAILED:
+                    await self._execute_step(task_state, current_step)
+                    self._mark_dirty(task_state)
                 
                 if current_step.status == TaskStatus.COMPLETED:
                     task_state.current_step_index += 1
@@ -136,78 +471,135 @@ class TaskContinuationSystem:
                         break
                     else:
                         await self._retry_step(task_state, current_step)
+                        self._mark_dirty(task_state)
                 elif current_step.status == TaskStatus.PAUSED:
                     task_state.status = TaskStatus.PAUSED
                     break
             
-            if task_state.current_step_index >= len(task_state.steps):
+            if (
+                    task_state.status == TaskStatus.IN_PROGRESS and
+                    task_state.current_step_index >= len(task_state.steps)
+            ):
                 task_state.status = TaskStatus.COMPLETED
         
         except Exception as e:
             await self._handle_task_error(task_state, e)
         
         finally:
-            task_state.updated_at = datetime.now()
+            task_state.touch()
             await self._save_task_state(task_state)
+            # 終了したタスクは保存済みなのでメモリから外す
+            if task_state.status in (
+                    TaskStatus.COMPLETED, TaskStatus.CANCELLED
+            ):
+                self.active_tasks.pop(task_id, None)
         
         return task_state
     
     async def continue_task(self, task_id: str) -> TaskState:
         """タスクを継続"""
-        task_state = await self._load_task_state(task_id)
-        if not task_state:
-            raise ValueError(f"Task {task_id} not found")
-        
-        if task_state.status in [TaskStatus.PAUSED, TaskStatus.FAILED]:
-            # 失敗したステップをリセット
-            if task_state.status == TaskStatus.FAILED:
-                current_step = task_state.steps[task_state.current_step_index]
-                current_step.status = TaskStatus.PENDING
-                current_step.error_message = None
-                current_step.error_type = None
+        async with self._exec_sem, self._task_lock(task_id):
+            task_state = await self._load_task_state(task_id)
+            if not task_state:
+                raise ValueError(f"Task {task_id} not found")
             
-            task_state.status = TaskStatus.PENDING
-            self.active_tasks[task_id] = task_state
-            return await self.execute_task(task_id)
-        
-        return task_state
+            if task_state.status in [TaskStatus.PAUSED, TaskStatus.FAILED]:
+                # 失敗したステップをリセット
+                if task_state.status == TaskStatus.FAILED:
+                    current_step = task_state.steps[
+                        task_state.current_step_index
+                    ]
+                    current_step._serialized = None
+                    current_step.status = TaskStatus.PENDING
+                    current_step.error_message = None
+                    current_step.error_type = None
+                
+                task_state.status = TaskStatus.PENDING
+                self._cache_task(task_state)
+                return await self._run_task(task_id)
+            
+            return task_state
     
     async def pause_task(self, task_id: str) -> TaskState:
         """タスクを一時停止"""
-        task_state = self.active_tasks.get(task_id)
+        task_state = self._get_active(task_id)
         if task_state and task_state.status == TaskStatus.IN_PROGRESS:
             task_state.status = TaskStatus.PAUSED
-            task_state.updated_at = datetime.now()
-            await self._save_task_state(task_state)
+            task_state.touch()
+            lock = self._task_lock(task_id)
+            # 実行中なら実行ループが停止時に保存する
+            if not lock.locked():
+                async with lock:
+                    await self._save_task_state(task_state)
         return task_state
     
     async def cancel_task(self, task_id: str) -> TaskState:
         """タスクをキャンセル"""
-        task_state = self.active_tasks.get(task_id)
-        if not task_state:
-            task_state = await self._load_task_state(task_id)
-        
-        if task_state:
+        lock = self._task_lock(task_id)
+        task_state = self._get_active(task_id)
+        if task_state and lock.locked():
+            # 実行中なら実行ループが停止時に保存してメモリから外す
             task_state.status = TaskStatus.CANCELLED
-            task_state.updated_at = datetime.now()
-            await self._save_task_state(task_state)
-            if task_id in self.active_tasks:
-                del self.active_tasks[task_id]
+            task_state.touch()
+            return task_state
+        
+        async with lock:
+            task_state = self._get_active(task_id)
+            if not task_state:
+                task_state = await self._load_task_state(task_id)
+            
+            if task_state:
+                task_state.status = TaskStatus.CANCELLED
+                task_state.touch()
+                await self._save_task_state(task_state)
+                self.active_tasks.pop(task_id, None)
         
         return task_state
     
     async def get_task_status(self, task_id: str) -> Optional[TaskState]:
         """タスクステータスを取得"""
-        task_state = self.active_tasks.get(task_id)
+        task_state = self._get_active(task_id)
         if not task_state:
             task_state = await self._load_task_state(task_id)
         return task_state
     
+    def _task_lock(self, task_id: str) -> asyncio.Lock:
+        """タスクごとのロックを取得"""
+        return self._task_locks.setdefault(task_id, asyncio.Lock())
+    
+    def _get_active(self, task_id: str) -> Optional[TaskState]:
+        """メモリ上のタスクを取得し、最近使用したものとして扱う"""
+        task_state = self.active_tasks.get(task_id)
+        if task_state is not None:
+            self.active_tasks.move_to_end(task_id)
+        return task_state
+    
+    def _cache_task(self, task_state: TaskState) -> None:
+        """タスクをメモリに保持し、上限を超えた古いタスクを破棄"""
+        self.active_tasks[task_state.task_id] = task_state
+        self.active_tasks.move_to_end(task_state.task_id)
+        
+        while len(self.active_tasks) > self.max_active_tasks:
+            # 実行中・未保存のタスクは破棄しない
+            evictable = next(
+                (
+                    task_id
+                    for task_id, cached in self.active_tasks.items()
+                    if cached.status != TaskStatus.IN_PROGRESS
+                    and task_id not in self._dirty
+                ),
+                None
+            )
+            if evictable is None:
+                break
+            del self.active_tasks[evictable]
+    
     async def list_tasks(
             self,
-            status_filter: Optional[TaskStatus] = None
+            status_filter: Optional[TaskStatus] = None,
+            limit: Optional[int] = None
     ) -> List[TaskState]:
-        """タスク一覧を取得"""
+        """タスク一覧を取得(更新日時の新しい順に最大 limit 件)"""
         tasks = []
         
         # アクティブなタスク
@@ -215,18 +607,58 @@ class TaskContinuationSystem:
             if not status_filter or task_state.status == status_filter:
                 tasks.append(task_state)
         
-        # 保存されたタスク
-        for state_file in self.state_dir.glob("*.json"):
-            task_id = state_file.stem
-            if task_id not in self.active_tasks:
-                task_state = await self._load_task_state(task_id)
-                if task_state and (
-                        not status_filter or 
-                        task_state.status == status_filter
-                ):
-                    tasks.append(task_state)
+        # 保存されたタスク(索引で絞り込み、並行して読み込み)
+        if not self._index_synced:
+            await self._sync_index()
+        # 上位 limit 件より古い保存済みタスクは結果に入らないので読み込まない
+        task_ids = await asyncio.to_thread(
+            self._index.query,
+            status_filter.value if status_filter else None,
+            limit
+        )
+        loaded_tasks = await asyncio.gather(*[
+            self._load_task_state(task_id)
+            for task_id in task_ids
+            if task_id not in self.active_tasks
+        ])
+        for task_state in loaded_tasks:
+            if task_state and (
+                    not status_filter or 
+                    task_state.status == status_filter
+            ):
+                tasks.append(task_state)
         
-        return sorted(tasks, key=lambda t: t.updated_at, reverse=True)
+        tasks.sort(key=lambda t: t.updated_at, reverse=True)
+        return tasks if limit is None else tasks[:limit]
+    
+    async def _sync_index(self) -> None:
+        """索引に未登録の状態ファイルを取り込む"""
+        indexed = await asyncio.to_thread(self._index.task_ids)
+        missing = [
+            task_id
+            for task_id in await asyncio.to_thread(self._scan_state_ids)
+            if task_id not in indexed
+        ]
+        for task_state in await asyncio.gather(*[
+            self._load_task_state(task_id) for task_id in missing
+        ]):
+            if task_state:
+                await asyncio.to_thread(
+                    self._index.upsert,
+                    task_state.task_id,
+                    task_state.status.value,
+                    task_state.updated_at.isoformat()
+                )
+        self._index_synced = True
+    
+    def _scan_state_ids(self) -> List[str]:
+        """状態ファイルのタスクIDを列挙(os.scandirでPath生成を省く)"""
+        with os.scandir(self.state_dir) as entries:
+            return [
+                entry.name[:-len(".json")]
+                for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
     
     async def _execute_step(
             self,
@@ -234,6 +666,7 @@ class TaskContinuationSystem:
             step: TaskStep
     ) -> None:
         """ステップを実行"""
+        step._serialized = None
         step.status = TaskStatus.IN_PROGRESS
         step.started_at = datetime.now()
         
@@ -243,26 +676,24 @@ class TaskContinuationSystem:
             await asyncio.sleep(0.1)  # 実際の処理をシミュレート
             
             # ステップの種類に応じた処理
-            step_type = step.context.get('type', 'default')
-            if step_type == 'file_operation':
-                await self._execute_file_operation(step)
-            elif step_type == 'api_call':
-                await self._execute_api_call(step)
-            elif step_type == 'validation':
-                await self._execute_validation(step)
-            else:
-                await self._execute_default_step(step)
+            executor = self._step_executors.get(
+                type(step.context), self._execute_default_step
+            )
+            await executor(step)
             
+            # 完了時刻をタスクの更新時刻にも流用する
+            now = datetime.now()
             step.status = TaskStatus.COMPLETED
-            step.completed_at = datetime.now()
+            step.completed_at = now
+            task_state.touch(now)
         
         except Exception as e:
             await self._handle_step_error(task_state, step, e)
     
     async def _execute_file_operation(self, step: TaskStep) -> None:
         """ファイル操作を実行"""
-        operation = step.context.get('operation')
-        _ = step.context.get('file_path')  # 未使用変数を明示的に無視
+        operation = step.context.operation
+        _ = step.context.file_path  # 未使用変数を明示的に無視
         
         if operation == 'read':
             # ファイル読み取り処理
@@ -276,14 +707,14 @@ class TaskContinuationSystem:
     
     async def _execute_api_call(self, step: TaskStep) -> None:
         """API呼び出しを実行"""
-        _ = step.context.get('url')  # 未使用変数を明示的に無視
-        _ = step.context.get('method', 'GET')  # 未使用変数を明示的に無視
+        _ = step.context.url  # 未使用変数を明示的に無視
+        _ = step.context.method  # 未使用変数を明示的に無視
         # API呼び出し処理
         pass
     
     async def _execute_validation(self, step: TaskStep) -> None:
         """バリデーションを実行"""
-        _ = step.context.get('validation_type')  # 未使用変数を明示的に無視
+        _ = step.context.validation_type  # 未使用変数を明示的に無視
         # バリデーション処理
         pass
     
@@ -298,17 +729,33 @@ class TaskContinuationSystem:
             step: TaskStep
     ) -> None:
         """ステップをリトライ"""
+        error_type = step.error_type
+        step._serialized = None
         step.retry_count += 1
         step.status = TaskStatus.PENDING
         step.error_message = None
         step.error_type = None
+        task_state.version += 1
         
-        # リトライ前の待機時間
-        wait_time = min(2 ** step.retry_count, 30)  # 指数バックオフ
-        await asyncio.sleep(wait_time)
+        # リトライ前の待機時間(ジッター付き指数バックオフ)
+        # 同じ障害で失敗したリトライが一斉に再開しないよう分散させる
+        wait_time = random.uniform(0, min(2 ** step.retry_count, 30))
+        backoff_event = self._backoff_events.setdefault(
+            error_type, asyncio.Event()
+        )
+        try:
+            await asyncio.wait_for(backoff_event.wait(), timeout=wait_time)
+        except asyncio.TimeoutError:
+            pass
         
         await self._execute_step(task_state, step)
     
+    def release_backoff(self, error_type: ErrorType) -> None:
+        """障害の復旧時に、そのエラータイプで待機中のリトライを即時再開"""
+        backoff_event = self._backoff_events.pop(error_type, None)
+        if backoff_event:
+            backoff_event.set()
+    
     async def _handle_step_error(
             self,
             task_state: TaskState,
@@ -316,32 +763,31 @@ class TaskContinuationSystem:
             error: Exception
     ) -> None:
         """ステップエラーを処理"""
+        now = datetime.now()
+        step._serialized = None
         error_type = self._classify_error(error)
+        error_message = str(error)
         step.error_type = error_type
-        step.error_message = str(error)
+        step.error_message = error_message
+        task_state.touch(now)
         
         # エラー履歴に追加
         error_record = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now.isoformat(),
             'step_id': step.step_id,
             'error_type': error_type.value,
-            'error_message': str(error),
+            'error_message': error_message,
             'retry_count': step.retry_count
         }
-        task_state.error_history.append(error_record)
+        await self._append_error(task_state, error_record)
         
-        # エラーハンドラーを実行
-        handler = self.error_handlers.get(error_type)
-        if handler:
-            recovery_suggestion = await handler(task_state, step, error)
-            if recovery_suggestion:
-                task_state.recovery_suggestions.append(recovery_suggestion)
+        # 復旧提案を追加
+        task_state.recovery_suggestions.append(
+            _RECOVERY_SUGGESTIONS[error_type.index]
+        )
         
-        # リトライ可能かチェック
-        if step.retry_count < step.max_retries:
-            step.status = TaskStatus.PENDING
-        else:
-            step.status = TaskStatus.FAILED
+        # リトライするかは実行ループが retry_count を見て判断する
+        step.status = TaskStatus.FAILED
     
     async def _handle_task_error(
             self,
@@ -349,164 +795,164 @@ class TaskContinuationSystem:
             error: Exception
     ) -> None:
         """タスクレベルのエラーを処理"""
+        now = datetime.now()
         task_state.status = TaskStatus.FAILED
+        task_state.touch(now)
         error_record = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now.isoformat(),
             'error_type': 'task_error',
             'error_message': str(error)
         }
+        await self._append_error(task_state, error_record)
+    
+    async def _append_error(
+            self,
+            task_state: TaskState,
+            error_record: Dict[str, Any]
+    ) -> None:
+        """エラー記録を履歴ファイルに追記"""
         task_state.error_history.append(error_record)
+        
+        error_file = self._error_file(task_state.task_id)
+        line = orjson.dumps(error_record, default=_json_default) + b"\n"
+        await asyncio.to_thread(_append_bytes, error_file, line)
+    
+    def _error_file(self, task_id: str) -> Path:
+        """エラー履歴ファイルのパス"""
+        return self.state_dir / f"{task_id}.errors.jsonl"
+    
+    def iter_error_history(self, task_id: str) -> Iterator[Dict[str, Any]]:
+        """エラー履歴ファイルを先頭から1件ずつ読み込む"""
+        error_file = self._error_file(task_id)
+        if not error_file.exists():
+            return
+        with open(error_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield _intern_error_record(orjson.loads(line))
     
     def _classify_error(self, error: Exception) -> ErrorType:
         """エラーを分類"""
-        error_str = str(error).lower()
-        
-        if 'network' in error_str or 'connection' in error_str:
-            return ErrorType.NETWORK_ERROR
-        elif 'file' in error_str or 'directory' in error_str:
-            return ErrorType.FILE_ERROR
-        elif 'permission' in error_str or 'access' in error_str:
-            return ErrorType.PERMISSION_ERROR
-        elif 'timeout' in error_str:
-            return ErrorType.TIMEOUT_ERROR
-        elif 'validation' in error_str or 'invalid' in error_str:
-            return ErrorType.VALIDATION_ERROR
-        elif 'interrupt' in error_str or 'cancelled' in error_str:
-            return ErrorType.USER_INTERRUPTION
-        else:
+        matched = [
+            match.lastgroup for match in _ERROR_PATTERN.finditer(str(error))
+        ]
+        if not matched:
             return ErrorType.SYSTEM_ERROR
+        return ErrorType[min(matched, key=_ERROR_PRIORITY.__getitem__)]
     
-    # エラーハンドラー
-    async def _handle_network_error(
-            self,
-            task_state: TaskState,
-            step: TaskStep,
-            error: Exception
-    ) -> str:
-        """ネットワークエラーを処理"""
-        return (
-            "ネットワーク接続を確認してください。"
-            "VPNやプロキシ設定も確認してください。"
-        )
+    def _mark_dirty(self, task_state: TaskState) -> None:
+        """タスクを未保存としてマークし、定期フラッシュで保存する"""
+        self._dirty[task_state.task_id] = task_state
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._periodic_flush())
     
-    async def _handle_file_error(
-            self,
-            task_state: TaskState,
-            step: TaskStep,
-            error: Exception
-    ) -> str:
-        """ファイルエラーを処理"""
-        return (
-            "ファイルパスとファイルの存在を確認してください。"
-            "ディスク容量も確認してください。"
-        )
+    async def _periodic_flush(self) -> None:
+        """未保存のタスク状態を一定間隔で保存"""
+        while self._dirty:
+            await asyncio.sleep(self.checkpoint_interval)
+            await self.flush()
     
-    async def _handle_permission_error(
-            self,
-            task_state: TaskState,
-            step: TaskStep,
-            error: Exception
-    ) -> str:
-        """権限エラーを処理"""
-        return (
-            "ファイルやディレクトリの権限を確認してください。"
-            "管理者権限が必要な場合があります。"
-        )
+    async def flush(self) -> None:
+        """未保存のタスク状態をすべて保存"""
+        dirty_tasks = list(self._dirty.values())
+        self._dirty.clear()
+        await asyncio.gather(*[
+            self._save_task_state(task_state) for task_state in dirty_tasks
+        ])
     
-    async def _handle_timeout_error(
-            self,
-            task_state: TaskState,
-            step: TaskStep,
-            error: Exception
-    ) -> str:
-        """タイムアウトエラーを処理"""
-        return (
-            "処理時間が長すぎます。タイムアウト設定を調整するか、"
-            "処理を分割してください。"
-        )
+    async def shutdown(self) -> None:
+        """定期フラッシュを停止し、未保存の状態を書き出す"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+        # 取り消された保存の書き込みが終わってから索引を閉じる
+        if self._writes:
+            await asyncio.wait(list(self._writes.values()))
+        self._index.close()
     
-    async def _handle_validation_error(
-            self,
-            task_state: TaskState,
-            step: TaskStep,
-            error: Exception
-    ) -> str:
-        """バリデーションエラーを処理"""
-        return (
-            "入力データの形式や値を確認してください。"
-            "必須フィールドが不足している可能性があります。"
-        )
+    async def _save_task_state(self, task_state: TaskState) -> None:
+        """タスク状態を保存(同じタスクの保存は順に行う)"""
+        task_id = task_state.task_id
+        lock = self._save_locks.setdefault(task_id, asyncio.Lock())
+        async with lock:
+            # 呼び出し元が取り消されても書き込みは続くため、終わるまで待つ
+            pending = self._writes.get(task_id)
+            if pending is not None:
+                await asyncio.wait([pending])
+            
+            write = asyncio.ensure_future(
+                self._serialize_and_write(task_state)
+            )
+            self._writes[task_id] = write
+            write.add_done_callback(
+                lambda done: self._forget_write(task_id, done)
+            )
+            await asyncio.shield(write)
     
-    async def _handle_system_error(
+    def _forget_write(
             self,
-            task_state: TaskState,
-            step: TaskStep,
-            error: Exception
-    ) -> str:
-        """システムエラーを処理"""
-        return (
-            "システムエラーが発生しました。ログを確認し、"
-            "必要に応じてシステムを再起動してください。"
+            task_id: str,
+            write: "asyncio.Future[None]"
+    ) -> None:
+        """終わった書き込みを書き込み中の一覧から外す"""
+        if self._writes.get(task_id) is write:
+            del self._writes[task_id]
+    
+    async def _serialize_and_write(self, task_state: TaskState) -> None:
+        """タスク状態をシリアライズして書き込む"""
+        self._dirty.pop(task_state.task_id, None)
+        state_file = self.state_dir / f"{task_state.task_id}.json"
+        
+        # dataclass・Enum・datetimeはorjsonがそのままシリアライズする
+        # (シリアライズはイベントループ上で行い、書き込みのみスレッドへ)
+        state_dict = {name: getattr(task_state, name) for name in _STATE_FIELDS}
+        head = orjson.dumps(
+            state_dict,
+            default=_json_default,
+            option=_ORJSON_OPTIONS
+        )
+        steps = b",".join(map(_serialize_step, task_state.steps))
+        payload = head[:-1] + b',"steps":[' + steps + b"]}"
+        await asyncio.to_thread(
+            self._write_state,
+            state_file,
+            payload,
+            task_state.status.value,
+            task_state.updated_at.isoformat()
         )
     
-    async def _handle_user_interruption(
+    def _write_state(
             self,
-            task_state: TaskState,
-            step: TaskStep,
-            error: Exception
-    ) -> str:
-        """ユーザー中断を処理"""
-        return (
-            "ユーザーによって処理が中断されました。"
-            "'継続'コマンドで作業を再開できます。"
+            state_file: Path,
+            payload: bytes,
+            status: str,
+            updated_at: str
+    ) -> None:
+        """状態ファイルを書き込み、索引を更新(ワーカースレッドで実行)"""
+        # 一時ファイルに書いてから置き換え、書き込み途中での破損を防ぐ
+        # (書き込みごとに別名にし、重なった書き込み同士で壊し合わない)
+        fd, tmp_file = tempfile.mkstemp(
+            dir=self.state_dir,
+            prefix=f"{state_file.stem}.",
+            suffix=".json.tmp"
         )
-    
-    async def _save_task_state(self, task_state: TaskState) -> None:
-        """タスク状態を保存"""
-        state_file = self.state_dir / f"{task_state.task_id}.json"
-        
-        # dataclassをJSONシリアライズ可能な形式に変換
-        state_dict = {
-            'task_id': task_state.task_id,
-            'title': task_state.title,
-            'description': task_state.description,
-            'status': task_state.status.value,
-            'current_step_index': task_state.current_step_index,
-            'created_at': task_state.created_at.isoformat(),
-            'updated_at': task_state.updated_at.isoformat(),
-            'context': task_state.context,
-            'error_history': task_state.error_history,
-            'recovery_suggestions': (
-                task_state.recovery_suggestions
-            ),
-            'steps': [
-                {
-                    'step_id': step.step_id,
-                    'description': step.description,
-                    'status': step.status.value,
-                    'started_at': (
-                        step.started_at.isoformat() 
-                        if step.started_at else None
-                    ),
-                    'completed_at': (
-                        step.completed_at.isoformat() 
-                        if step.completed_at else None
-                    ),
-                    'error_message': step.error_message,
-                    'error_type': (
-                        step.error_type.value 
-                        if step.error_type else None
-                    ),
-                    'retry_count': step.retry_count,
-                    'max_retries': step.max_retries,
-                    'context': step.context
-                }
-                for step in task_state.steps
-            ]
-        }
-        
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state_dict, f, ensure_ascii=False, indent=2)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                if status in _DURABLE_STATUSES:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_file, state_file)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_file)
+            raise
+        self._index.upsert(state_file.stem, status, updated_at)
     
     async def _load_task_state(self, task_id: str) -> Optional[TaskState]:
         """タスク状態を読み込み"""
@@ -516,57 +962,72 @@ class TaskContinuationSystem:
             return None
         
         try:
-            with open(state_file, 'r', encoding='utf-8') as f:
-                state_dict = json.load(f)
+            state_dict = orjson.loads(
+                await asyncio.to_thread(state_file.read_bytes)
+            )
             
             # JSONからdataclassに変換
             steps = [
-                TaskStep(
-                    step_id=step_data['step_id'],
-                    description=step_data['description'],
-                    status=TaskStatus(step_data['status']),
-                    started_at=(
-                        datetime.fromisoformat(step_data['started_at']) 
-                        if step_data['started_at'] else None
-                    ),
-                    completed_at=(
-                        datetime.fromisoformat(step_data['completed_at']) 
-                        if step_data['completed_at'] else None
+                TaskStep(**{
+                    **step_data,
+                    'step_id': sys.intern(step_data['step_id']),
+                    'status': _STATUS_MAP[step_data['status']],
+                    'started_at': _parse_datetime(step_data['started_at']),
+                    'completed_at': _parse_datetime(
+                        step_data['completed_at']
                     ),
-                    error_message=step_data['error_message'],
-                    error_type=(
-                        ErrorType(step_data['error_type']) 
+                    'error_type': (
+                        _ERROR_TYPE_MAP[step_data['error_type']]
                         if step_data['error_type'] else None
                     ),
-                    retry_count=step_data['retry_count'],
-                    max_retries=step_data['max_retries'],
-                    context=step_data['context']
-                )
-                for step_data in state_dict['steps']
+                    'context': _build_step_context(step_data['context']),
+                })
+                for step_data in state_dict.pop('steps')
             ]
             
-            task_state = TaskState(
-                task_id=state_dict['task_id'],
-                title=state_dict['title'],
-                description=state_dict['description'],
-                status=TaskStatus(state_dict['status']),
-                steps=steps,
-                current_step_index=state_dict['current_step_index'],
-                created_at=datetime.fromisoformat(state_dict['created_at']),
-                updated_at=datetime.fromisoformat(state_dict['updated_at']),
-                context=state_dict['context'],
-                error_history=state_dict['error_history'],
-                recovery_suggestions=state_dict['recovery_suggestions']
+            # 旧形式(状態ファイル内のerror_history)にも対応
+            legacy_history = state_dict.pop('error_history', [])
+            error_history = await asyncio.to_thread(
+                self._read_error_tail, task_id
             )
             
-            return task_state
+            return TaskState(**{
+                **state_dict,
+                'error_history': error_history or deque(
+                    map(_intern_error_record, legacy_history),
+                    maxlen=_ERROR_HISTORY_LIMIT
+                ),
+                'recovery_suggestions': deque(
+                    state_dict['recovery_suggestions'],
+                    maxlen=_RECOVERY_SUGGESTION_LIMIT
+                ),
+                'status': _STATUS_MAP[state_dict['status']],
+                'steps': steps,
+                'created_at': datetime.fromisoformat(state_dict['created_at']),
+                'updated_at': datetime.fromisoformat(state_dict['updated_at']),
+            })
         
-        except Exception as e:
-            print(f"Failed to load task state {task_id}: {e}")
+        except (OSError, KeyError, TypeError, ValueError):
+            # orjson.JSONDecodeError は ValueError のサブクラス
+            logger.exception("Failed to load task state %s", task_id)
             return None
     
+    def _read_error_tail(self, task_id: str) -> Deque[Dict[str, Any]]:
+        """エラー履歴ファイルの末尾を読み込む"""
+        return deque(
+            self.iter_error_history(task_id), maxlen=_ERROR_HISTORY_LIMIT
+        )
+    
     def format_task_status(self, task_state: TaskState) -> str:
-        """タスクステータスをフォーマット"""
+        """タスクステータスをフォーマット(変更がなければキャッシュを返す)"""
+        cache_key = (
+            task_state.version,
+            task_state.status,
+            task_state.current_step_index
+        )
+        if task_state._formatted and task_state._formatted[0] == cache_key:
+            return task_state._formatted[1]
+        
         status_icons = {
             TaskStatus.PENDING: "⏳",
             TaskStatus.IN_PROGRESS: "🔄",
@@ -588,7 +1049,8 @@ class TaskContinuationSystem:
         
         if task_state.status == TaskStatus.FAILED and task_state.recovery_suggestions:
             status_text += "\n💡 **復旧提案:**\n"
-            for suggestion in task_state.recovery_suggestions[-3:]:  # 最新3件
+            # 最新3件
+            for suggestion in list(task_state.recovery_suggestions)[-3:]:
                 status_text += f"• {suggestion}\n"
         
         if task_state.current_step_index < len(task_state.steps):
@@ -598,4 +1060,5 @@ class TaskContinuationSystem:
             if current_step.error_message:
                 status_text += f"⚠️ **エラー:** {current_step.error_message}\n"
         
+        task_state._formatted = (cache_key, status_text)
         return status_text
\ No newline at end of file
@@ -1,11 +1,99 @@
+import asyncio
+import heapq
+import logging
+import re
+import time
+from collections import OrderedDict
 from enum import Enum
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Protocol, Tuple
+from dataclasses import dataclass, replace
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+# タグとして検出する技術用語やプログラミング言語
+_TECH_TERMS = (
+    'python', 'javascript', 'react', 'node.js', 'docker',
+    'kubernetes', 'aws', 'azure', 'gcp', 'api', 'rest',
+    'graphql', 'database', 'sql', 'nosql', 'mongodb',
+    'postgresql', 'mysql', 'redis', 'nginx', 'apache'
+)
+_TECH_TERM_SET = frozenset(_TECH_TERMS)
+_TECH_TERM_ORDER = {term: i for i, term in enumerate(_TECH_TERMS)}
+# 英数字の語を切り出す(node.js のようなドット区切りは1語として扱う)
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+(?:\.[a-z0-9+#]+)*')
+
+
+# 検索結果キャッシュの有効期間(秒)と最大件数
+_RESULT_CACHE_TTL = 300.0
+_RESULT_CACHE_SIZE = 512
+
+# BM25 のパラメータ
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+
+def _tokenize(text: str) -> List[str]:
+    """関連性計算用に語へ分割(casefold で Unicode の大文字小文字を統一)"""
+    return text.casefold().split()
+
+
+def _bm25_scores(
+        query_tokens: FrozenSet[str],
+        documents: List[List[str]]
+) -> np.ndarray:
+    """クエリに対する各文書のBM25スコアを一括で計算(最大値で0.0-1.0に正規化)"""
+    if not query_tokens or not documents:
+        return np.zeros(len(documents))
+    
+    # クエリ語 x 文書 の出現回数行列
+    terms = list(query_tokens)
+    term_index = {term: i for i, term in enumerate(terms)}
+    tf = np.zeros((len(terms), len(documents)))
+    for j, tokens in enumerate(documents):
+        for token in tokens:
+            i = term_index.get(token)
+            if i is not None:
+                tf[i, j] += 1
+    
+    doc_len = np.array([len(tokens) for tokens in documents], dtype=float)
+    avg_len = doc_len.mean() or 1.0
+    doc_freq = np.count_nonzero(tf, axis=1)
+    idf = np.log((len(documents) - doc_freq + 0.5) / (doc_freq + 0.5) + 1.0)
+    
+    norm = _BM25_K1 * (1.0 - _BM25_B + _BM25_B * doc_len / avg_len)
+    scores = idf @ (tf * (_BM25_K1 + 1.0) / (tf + norm))
+    
+    max_score = scores.max()
+    return scores / max_score if max_score > 0 else scores
+
+
+@lru_cache(maxsize=1024)
+def _extract_tags_cached(content_lower: str) -> Tuple[str, ...]:
+    """小文字化済みコンテンツからタグを抽出(同じ内容は結果を再利用)"""
+    # 語に分割して技術用語の集合と突き合わせる
+    found = _TECH_TERM_SET.intersection(_TOKEN_RE.findall(content_lower))
+    found_tags = sorted(found, key=_TECH_TERM_ORDER.__getitem__)
+    
+    return tuple(found_tags[:5])  # 最大5個のタグ
 
 
 class EvidenceType(Enum):
     """エビデンスの種類"""
+    
+    def __new__(cls, value: str) -> "EvidenceType":
+        # 宣言順の序数を index として持たせ、タプル参照に使う
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj.index = len(cls.__members__)
+        return obj
+    
     WEB_SEARCH = "web_search"  # Web検索結果
     DOCUMENTATION = "documentation"  # 技術文書
     CODE_REFERENCE = "code_reference"  # コード参照
@@ -20,12 +108,30 @@ class EvidenceType(Enum):
 
 class CredibilityLevel(Enum):
     """信頼性レベル"""
+    
+    def __new__(cls, value: str) -> "CredibilityLevel":
+        # 宣言順の序数を index として持たせ、配列参照に使う
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj.index = len(cls.__members__)
+        return obj
+    
     HIGH = "high"  # 高信頼性（公式文書、学術論文等）
     MEDIUM = "medium"  # 中信頼性（技術ブログ、Stack Overflow等）
     LOW = "low"  # 低信頼性（個人ブログ、未検証情報等）
 
 
-@dataclass
+class SearchBackend(Protocol):
+    """検索バックエンド(上流の検索サービスを呼び出して生の結果を返す)"""
+    
+    async def search(self,
+                     query: str,
+                     max_results: int) -> List[Dict[str, str]]:
+        """検索結果(title, url, content, 任意で summary)のリストを返す"""
+        ...
+
+
+@dataclass(slots=True, frozen=True)
 class Evidence:
     """エビデンス情報"""
     title: str
@@ -40,7 +146,7 @@ class Evidence:
     summary: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EvidenceCollection:
     """エビデンスコレクション"""
     query: str
@@ -53,12 +159,63 @@ class EvidenceCollection:
 class EvidenceSystem:
     """エビデンス提示システム - 根拠となる情報を収集・提示"""
     
-    def __init__(self):
+    # EvidenceType.index で引く見出しアイコン(宣言順と対応)
+    _EVIDENCE_ICONS = (
+        "🔍 Web検索結果",
+        "📚 技術文書",
+        "💻 コード参照",
+        "🎓 学術論文",
+        "📋 公式文書",
+        "❓ Stack Overflow",
+        "🐛 GitHub Issue",
+        "✍️ ブログ記事",
+        "🎯 チュートリアル",
+        "⚙️ API文書"
+    )
+    
+    # CredibilityLevel.index で引く信頼性インジケーター
+    _CREDIBILITY_INDICATORS = ("🟢", "🟡", "🔴")
+    
+    def __init__(
+            self,
+            backends: Optional[Dict[EvidenceType, SearchBackend]] = None
+    ):
+        # タイプ別の検索バックエンド(未指定のタイプはモックを使用)
+        self._backends: Dict[EvidenceType, SearchBackend] = {
+            EvidenceType.WEB_SEARCH: _MockBraveSearch(),
+            EvidenceType.DOCUMENTATION: _MockRefSearch(),
+            EvidenceType.STACK_OVERFLOW: _MockBraveSearch(),
+            EvidenceType.GITHUB_ISSUE: _MockGitHubSearch()
+        }
+        if backends:
+            self._backends.update(backends)
+        
+        # タイプ別のエビデンス生成処理
+        self._providers = {
+            EvidenceType.WEB_SEARCH: self._web_search,
+            EvidenceType.DOCUMENTATION: self._search_documentation,
+            EvidenceType.STACK_OVERFLOW: self._search_stackoverflow,
+            EvidenceType.GITHUB_ISSUE: self._search_github_issues
+        }
+        
+        # 実行中の検索 (同じキーの同時呼び出しは1回の上流呼び出しにまとめる)
+        self._inflight: Dict[
+            Tuple[str, EvidenceType, int], 'asyncio.Task[List[Evidence]]'
+        ] = {}
+        # 完了した検索結果の TTL 付き LRU キャッシュ (キー -> (期限, 結果))
+        self._result_cache: 'OrderedDict[Tuple[str, EvidenceType, int], ' \
+            'Tuple[float, List[Evidence]]]' = OrderedDict()
+        
         self.credibility_weights = {
             CredibilityLevel.HIGH: 1.0,
             CredibilityLevel.MEDIUM: 0.7,
             CredibilityLevel.LOW: 0.4
         }
+        # CredibilityLevel.index で引く重み配列(信頼性スコアの一括計算用)
+        self._credibility_weight_array = np.array(
+            [self.credibility_weights[level] for level in CredibilityLevel],
+            dtype=np.float32
+        )
         
         self.domain_credibility = {
             # 高信頼性ドメイン
@@ -82,27 +239,18 @@ class EvidenceSystem:
             "ieee.org": CredibilityLevel.HIGH,
             "acm.org": CredibilityLevel.HIGH
         }
-        
-        self.evidence_templates = {
-            "web_search": "🔍 Web検索結果",
-            "documentation": "📚 技術文書",
-            "code_reference": "💻 コード参照",
-            "academic_paper": "🎓 学術論文",
-            "official_docs": "📋 公式文書",
-            "stack_overflow": "❓ Stack Overflow",
-            "github_issue": "🐛 GitHub Issue",
-            "blog_post": "✍️ ブログ記事",
-            "tutorial": "🎯 チュートリアル",
-            "api_docs": "⚙️ API文書"
-        }
     
     async def gather_evidence(
             self,
             query: str,
             evidence_types: Optional[List[EvidenceType]] = None,
-            max_results: int = 5
+            max_results: int = 5,
+            min_relevance_score: float = 0.0
     ) -> EvidenceCollection:
-        """指定されたクエリに対してエビデンスを収集"""
+        """指定されたクエリに対してエビデンスを収集
+        
+        min_relevance_score 未満の関連性しかないエビデンスは候補から除外する
+        """
         if evidence_types is None:
             evidence_types = [
                 EvidenceType.WEB_SEARCH,
@@ -110,16 +258,50 @@ class EvidenceSystem:
                 EvidenceType.STACK_OVERFLOW
             ]
         
+        # 収集時刻は1回の呼び出しにつき1度だけ取得して共有する
+        now = datetime.now()
+        
+        # 合計が max_results になるよう件数を配分し、0件のタイプは検索しない
+        base, extra = divmod(max_results, max(len(evidence_types), 1))
+        budgets = [
+            (evidence_type, base + (1 if i < extra else 0))
+            for i, evidence_type in enumerate(evidence_types)
+        ]
+        budgets = [(t, budget) for t, budget in budgets if budget > 0]
+        
+        # タイプ別の検索を並行して実行
+        results = await asyncio.gather(
+            *[
+                self._search_by_type(query, evidence_type, budget, now)
+                for evidence_type, budget in budgets
+            ],
+            return_exceptions=True
+        )
+        
         evidences = []
+        for (evidence_type, _), result in zip(budgets, results):
+            if isinstance(result, BaseException):
+                logger.error("エビデンス検索エラー (%s)", evidence_type.value,
+                             exc_info=result)
+                continue
+            evidences.extend(result)
         
-        for evidence_type in evidence_types:
-            type_evidences = await self._search_by_type(
-                query, evidence_type, max_results // len(evidence_types))
-            evidences.extend(type_evidences)
+        # 収集した結果全体を1回のBM25計算でスコアリング
+        scores = _bm25_scores(
+            self._prepare_query(query),
+            [_tokenize(evidence.content) for evidence in evidences]
+        )
         
-        # 関連性でソート
-        evidences.sort(key=lambda x: x.relevance_score, reverse=True)
-        evidences = evidences[:max_results]
+        # 閾値未満を除外し、上位 max_results 件だけをヒープで選択
+        evidences = heapq.nlargest(
+            max_results,
+            (
+                replace(evidence, relevance_score=float(score))
+                for evidence, score in zip(evidences, scores)
+                if score >= min_relevance_score
+            ),
+            key=lambda x: x.relevance_score
+        )
         
         # 信頼性スコアを計算
         confidence_score = self._calculate_confidence_score(evidences)
@@ -128,205 +310,202 @@ class EvidenceSystem:
             query=query,
             evidences=evidences,
             total_sources=len(evidences),
-            search_timestamp=datetime.now(),
+            search_timestamp=now,
             confidence_score=confidence_score
         )
     
     async def _search_by_type(self,
                               query: str,
                               evidence_type: EvidenceType,
-                              max_results: int) -> List[Evidence]:
-        """タイプ別エビデンス検索"""
-        evidences = []
+                              max_results: int,
+                              now: datetime) -> List[Evidence]:
+        """タイプ別エビデンス検索
+        
+        期限内のキャッシュがあればそれを返し、同じ検索が実行中なら
+        その結果を共有する
+        """
+        key = (query, evidence_type, max_results)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            expires_at, evidences = cached
+            if expires_at > time.monotonic():
+                self._result_cache.move_to_end(key)
+                return evidences
+            del self._result_cache[key]
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch_by_type(query, evidence_type, max_results, now))
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda done: self._on_search_done(key, done))
         
-        if evidence_type == EvidenceType.WEB_SEARCH:
-            evidences = await self._web_search(query, max_results)
-        elif evidence_type == EvidenceType.DOCUMENTATION:
-            evidences = await self._search_documentation(query, max_results)
-        elif evidence_type == EvidenceType.STACK_OVERFLOW:
-            evidences = await self._search_stackoverflow(query, max_results)
-        elif evidence_type == EvidenceType.GITHUB_ISSUE:
-            evidences = await self._search_github_issues(query, max_results)
+        # 呼び出し元のキャンセルが共有中の検索を止めないよう shield する
+        return await asyncio.shield(task)
+    
+    def _on_search_done(self,
+                        key: Tuple[str, EvidenceType, int],
+                        task: 'asyncio.Task[List[Evidence]]') -> None:
+        """完了した検索を実行中から外し、結果をキャッシュに登録"""
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        
+        evidences = task.result()
+        # プロバイダーはエラー時に空リストを返すため、空の結果は保存しない
+        if not evidences:
+            return
         
-        return evidences
+        self._result_cache[key] = (
+            time.monotonic() + _RESULT_CACHE_TTL, evidences)
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > _RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+    
+    async def _fetch_by_type(self,
+                             query: str,
+                             evidence_type: EvidenceType,
+                             max_results: int,
+                             now: datetime) -> List[Evidence]:
+        """タイプ別に上流の検索を実行"""
+        provider = self._providers.get(evidence_type)
+        if provider is None or evidence_type not in self._backends:
+            return []
+        
+        return await provider(query, max_results, now)
     
     async def _web_search(self,
                           query: str,
-                          max_results: int) -> List[Evidence]:
+                          max_results: int,
+                          now: datetime) -> List[Evidence]:
         """Web検索を実行"""
         # Brave Search MCPを使用
         try:
-            # 実際の実装では run_mcp を使用
-            search_results = await self._mock_brave_search(query, max_results)
-            evidences = []
-            
-            for result in search_results:
-                credibility = self._determine_credibility(result['url'])
-                relevance = self._calculate_relevance(query, result['content'])
-                
-                evidence = Evidence(
-                    title=result['title'],
-                    url=result['url'],
-                    content=result['content'],
-                    evidence_type=EvidenceType.WEB_SEARCH,
-                    credibility=credibility,
-                    timestamp=datetime.now(),
-                    relevance_score=relevance,
-                    source_domain=self._extract_domain(
-                        result['url']),
-                    tags=self._extract_tags(result['content']),
-                    summary=result.get('summary')
+            backend = self._backends[EvidenceType.WEB_SEARCH]
+            search_results = await backend.search(query, max_results)
+            return [
+                self._build_evidence(
+                    result, EvidenceType.WEB_SEARCH, now
                 )
-                evidences.append(evidence)
-            
-            return evidences
-        except Exception as e:
-            print(f"Web検索エラー: {e}")
+                for result in search_results
+            ]
+        except Exception:
+            logger.exception("Web検索エラー")
             return []
     
     async def _search_documentation(self,
                                     query: str,
-                                    max_results: int
+                                    max_results: int,
+                                    now: datetime
                                     ) -> List[Evidence]:
         """技術文書を検索"""
         # Ref MCPを使用
         try:
-            # 実際の実装では run_mcp を使用
-            doc_results = await self._mock_ref_search(query, max_results)
-            evidences = []
-            
-            for result in doc_results:
-                evidence = Evidence(
-                    title=result['title'],
-                    url=result['url'],
-                    content=result['content'],
-                    evidence_type=EvidenceType.DOCUMENTATION,
-                    credibility=CredibilityLevel.HIGH,
-                    timestamp=datetime.now(),
-                    relevance_score=self._calculate_relevance(
-                        query, result['content']),
-                    source_domain=self._extract_domain(result['url']),
-                    tags=self._extract_tags(result['content'])
+            backend = self._backends[EvidenceType.DOCUMENTATION]
+            doc_results = await backend.search(query, max_results)
+            return [
+                self._build_evidence(
+                    result, EvidenceType.DOCUMENTATION, now,
+                    credibility=CredibilityLevel.HIGH
                 )
-                evidences.append(evidence)
-            
-            return evidences
-        except Exception as e:
-            print(f"文書検索エラー: {e}")
+                for result in doc_results
+            ]
+        except Exception:
+            logger.exception("文書検索エラー")
             return []
     
     async def _search_stackoverflow(self,
                                     query: str,
-                                    max_results: int
+                                    max_results: int,
+                                    now: datetime
                                     ) -> List[Evidence]:
         """Stack Overflow検索"""
         # Stack Overflow APIまたはWeb検索を使用
         try:
             # site:stackoverflow.com でWeb検索
             so_query = f"site:stackoverflow.com {query}"
-            search_results = await self._mock_brave_search(
-                so_query, max_results)
-            evidences = []
-            
-            for result in search_results:
-                evidence = Evidence(
-                    title=result['title'],
-                    url=result['url'],
-                    content=result['content'],
-                    evidence_type=EvidenceType.STACK_OVERFLOW,
+            backend = self._backends[EvidenceType.STACK_OVERFLOW]
+            search_results = await backend.search(so_query, max_results)
+            return [
+                self._build_evidence(
+                    result, EvidenceType.STACK_OVERFLOW, now,
                     credibility=CredibilityLevel.MEDIUM,
-                    timestamp=datetime.now(),
-                    relevance_score=self._calculate_relevance(
-                        query, result['content']),
-                    source_domain="stackoverflow.com",
-                    tags=self._extract_tags(result['content'])
+                    source_domain="stackoverflow.com"
                 )
-                evidences.append(evidence)
-            
-            return evidences
-        except Exception as e:
-            print(f"Stack Overflow検索エラー: {e}")
+                for result in search_results
+            ]
+        except Exception:
+            logger.exception("Stack Overflow検索エラー")
             return []
     
     async def _search_github_issues(self,
                                     query: str,
-                                    max_results: int
+                                    max_results: int,
+                                    now: datetime
                                     ) -> List[Evidence]:
         """GitHub Issues検索"""
         # GitHub MCPを使用
         try:
-            # 実際の実装では run_mcp を使用
-            github_results = await self._mock_github_search(
-                query, max_results)
-            evidences = []
-            
-            for result in github_results:
-                evidence = Evidence(
-                    title=result['title'],
-                    url=result['url'],
-                    content=result['content'],
-                    evidence_type=EvidenceType.GITHUB_ISSUE,
+            backend = self._backends[EvidenceType.GITHUB_ISSUE]
+            github_results = await backend.search(query, max_results)
+            return [
+                self._build_evidence(
+                    result, EvidenceType.GITHUB_ISSUE, now,
                     credibility=CredibilityLevel.MEDIUM,
-                    timestamp=datetime.now(),
-                    relevance_score=self._calculate_relevance(
-                        query, result['content']),
-                    source_domain="github.com",
-                    tags=self._extract_tags(result['content'])
+                    source_domain="github.com"
                 )
-                evidences.append(evidence)
-            
-            return evidences
-        except Exception as e:
-            print(f"GitHub検索エラー: {e}")
+                for result in github_results
+            ]
+        except Exception:
+            logger.exception("GitHub検索エラー")
             return []
     
+    def _build_evidence(
+            self,
+            result: Dict[str, str],
+            evidence_type: EvidenceType,
+            now: datetime,
+            credibility: Optional[CredibilityLevel] = None,
+            source_domain: Optional[str] = None
+    ) -> Evidence:
+        """検索結果1件からエビデンスを生成(関連性は収集後に一括計算)"""
+        url = result['url']
+        content = result['content']
+        return Evidence(
+            title=result['title'],
+            url=url,
+            content=content,
+            evidence_type=evidence_type,
+            credibility=credibility or self._determine_credibility(url),
+            timestamp=now,
+            relevance_score=0.0,
+            source_domain=source_domain or self._extract_domain(url),
+            tags=self._extract_tags(content),
+            summary=result.get('summary')
+        )
+    
     def _determine_credibility(self, url: str) -> CredibilityLevel:
-        """URLから信頼性を判定"""
+        """URLから信頼性を判定(ドメイン抽出はキャッシュ済み)"""
         domain = self._extract_domain(url)
         return self.domain_credibility.get(domain, CredibilityLevel.LOW)
     
-    def _extract_domain(self, url: str) -> str:
-        """URLからドメインを抽出"""
-        import re
-        match = re.search(r'https?://([^/]+)', url)
-        if match:
-            domain = match.group(1)
-            # www. を除去
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            return domain
-        return ""
-    
-    def _calculate_relevance(self, query: str, content: str) -> float:
-        """関連性スコアを計算"""
-        query_words = set(query.lower().split())
-        content_words = set(content.lower().split())
-        
-        if not query_words:
-            return 0.0
-        
-        # 単純な単語マッチング（実際の実装ではより高度な手法を使用）
-        matches = len(query_words.intersection(content_words))
-        return min(matches / len(query_words), 1.0)
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _extract_domain(url: str) -> str:
+        """URLからドメインを抽出(同じURLは結果を再利用)"""
+        domain = urlsplit(url).netloc
+        # www. を除去
+        return domain[4:] if domain.startswith('www.') else domain
+    
+    @staticmethod
+    def _prepare_query(query: str) -> FrozenSet[str]:
+        """クエリを関連性計算用の語集合に変換"""
+        return frozenset(_tokenize(query))
     
     def _extract_tags(self, content: str) -> List[str]:
         """コンテンツからタグを抽出"""
-        # 技術用語やプログラミング言語を検出
-        tech_terms = [
-            'python', 'javascript', 'react', 'node.js', 'docker',
-            'kubernetes', 'aws', 'azure', 'gcp', 'api', 'rest',
-            'graphql', 'database', 'sql', 'nosql', 'mongodb',
-            'postgresql', 'mysql', 'redis', 'nginx', 'apache'
-        ]
-        
-        content_lower = content.lower()
-        found_tags = []
-        
-        for term in tech_terms:
-            if term in content_lower:
-                found_tags.append(term)
-        
-        return found_tags[:5]  # 最大5個のタグ
+        return list(_extract_tags_cached(content.lower()))
     
     def _calculate_confidence_score(self,
                                     evidences: List[Evidence]) -> float:
@@ -334,16 +513,20 @@ class EvidenceSystem:
         if not evidences:
             return 0.0
         
-        total_score = 0.0
-        total_weight = 0.0
-        
-        for evidence in evidences:
-            weight = self.credibility_weights[evidence.credibility]
-            score = evidence.relevance_score * weight
-            total_score += score
-            total_weight += weight
+        # 関連性と重みを配列にまとめ、重み付き平均を一括で計算
+        relevance = np.fromiter(
+            (evidence.relevance_score for evidence in evidences),
+            dtype=np.float32,
+            count=len(evidences)
+        )
+        weights = self._credibility_weight_array[
+            [evidence.credibility.index for evidence in evidences]
+        ]
         
-        return total_score / total_weight if total_weight > 0 else 0.0
+        total_weight = weights.sum()
+        if total_weight <= 0:
+            return 0.0
+        return float(relevance @ weights / total_weight)
     
     def format_evidence_section(self,
                                 collection: EvidenceCollection) -> str:
@@ -352,45 +535,42 @@ class EvidenceSystem:
             return ("\n\n📋 **参考情報**\n"
                     "関連する情報が見つかりませんでした。")
         
-        section = (f"\n\n📋 **参考情報** "
-                   f"(信頼性: {collection.confidence_score:.1%})\n")
+        # 部品をリストに集めて最後に1回だけ連結する
+        parts = [f"\n\n📋 **参考情報** "
+                 f"(信頼性: {collection.confidence_score:.1%})\n"]
         
         for i, evidence in enumerate(collection.evidences, 1):
-            icon = self.evidence_templates.get(
-                evidence.evidence_type.value, "📄")
-            credibility_indicator = self._get_credibility_indicator(
-                evidence.credibility)
+            icon = self._EVIDENCE_ICONS[evidence.evidence_type.index]
+            credibility_indicator = self._CREDIBILITY_INDICATORS[
+                evidence.credibility.index]
             
-            section += (f"{i}. {icon} **{evidence.title}** "
-                        f"{credibility_indicator}\n")
-            section += f"   🔗 {evidence.url}\n"
+            parts.append(f"{i}. {icon} **{evidence.title}** "
+                         f"{credibility_indicator}\n"
+                         f"   🔗 {evidence.url}\n")
             
             if evidence.summary:
-                section += f"   💡 {evidence.summary}\n"
+                parts.append(f"   💡 {evidence.summary}\n")
             
             if evidence.tags:
-                tags_str = ", ".join(evidence.tags[:3])
-                section += f"   🏷️ {tags_str}\n"
+                parts.append(f"   🏷️ {', '.join(evidence.tags[:3])}\n")
             
-            section += "\n"
+            parts.append("\n")
         
-        return section
+        return "".join(parts)
     
     def _get_credibility_indicator(self,
                                    credibility: CredibilityLevel) -> str:
         """信頼性インジケーターを取得"""
-        indicators = {
-            CredibilityLevel.HIGH: "🟢",
-            CredibilityLevel.MEDIUM: "🟡",
-            CredibilityLevel.LOW: "🔴"
-        }
-        return indicators.get(credibility, "⚪")
+        return self._CREDIBILITY_INDICATORS[credibility.index]
+
+
+# モックバックエンド（実際の実装では run_mcp を使うバックエンドに差し替える）
+class _MockBraveSearch:
+    """Brave Search のモック"""
     
-    # モック関数（実際の実装では削除）
-    async def _mock_brave_search(self,
-                                 query: str,
-                                 max_results: int) -> List[Dict[str, str]]:
-        """Brave Search のモック"""
+    async def search(self,
+                     query: str,
+                     max_results: int) -> List[Dict[str, str]]:
         return [
             {
                 "title": f"検索結果 1: {query}",
@@ -399,11 +579,14 @@ class EvidenceSystem:
                 "summary": f"{query}の概要説明"
             }
         ]
+
+
+class _MockRefSearch:
+    """Ref Search のモック"""
     
-    async def _mock_ref_search(self,
-                               query: str,
-                               max_results: int) -> List[Dict[str, str]]:
-        """Ref Search のモック"""
+    async def search(self,
+                     query: str,
+                     max_results: int) -> List[Dict[str, str]]:
         return [
             {
                 "title": f"技術文書: {query}",
@@ -411,15 +594,18 @@ class EvidenceSystem:
                 "content": f"{query}の技術的な説明です。"
             }
         ]
+
+
+class _MockGitHubSearch:
+    """GitHub Search のモック"""
     
-    async def _mock_github_search(self,
-                                  query: str,
-                                  max_results: int) -> List[Dict[str, str]]:
-        """GitHub Search のモック"""
+    async def search(self,
+                     query: str,
+                     max_results: int) -> List[Dict[str, str]]:
         return [
             {
                 "title": f"GitHub Issue: {query}",
                 "url": "https://github.com/example/repo/issues/123",
                 "content": f"{query}に関するIssueの内容です。"
             }
-        ]
\ No newline at end of file
+        ]
@@ -4,6 +4,15 @@
 スケーラブルな統合システムパッケージ
 """
 
+import asyncio
+from pathlib import Path
+
+try:
+    import uvloop
+except ImportError:
+    # Windows など uvloop が使えない環境では標準のイベントループを使う
+    uvloop = None
+
 from .cross_platform_system import (
     CrossPlatformSystem,
     PlatformType,
@@ -90,32 +99,27 @@ __all__ = [
 ]
 
 
-def create_integration_system(
-    config_path: str = "integration_config.json",
-    auto_start: bool = True
-) -> CrossPlatformSystem:
-    """統合システムを作成・初期化
-    
-    Args:
-        config_path: 設定ファイルのパス
-        auto_start: 自動的に同期サービスを開始するか
+def _install_uvloop() -> None:
+    """uvloop が利用可能ならイベントループポリシーとして設定
     
-    Returns:
-        CrossPlatformSystem: 初期化された統合システム
+    既に実行中のループがある場合はホスト側のループを尊重して何もしない
     """
-    # 設定管理を初期化
-    config_manager = ConfigurationManager(config_path)
-    
-    # イベントバスを初期化
-    event_bus = get_event_bus()
-    
-    # 統合システムを作成
-    system = CrossPlatformSystem(config_path)
-    
-    # アダプターマネージャーを初期化
-    adapter_manager = AdapterManager()
+    if uvloop is None:
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        policy = asyncio.get_event_loop_policy()
+        if not isinstance(policy, uvloop.EventLoopPolicy):
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def _build_default_adapters(adapter_manager: AdapterManager) -> None:
+    """デフォルトのアダプター設定を登録
     
-    # デフォルトアダプター設定を登録
+    Args:
+        adapter_manager: 登録先のアダプターマネージャー
+    """
     adapter_manager.register_adapter_config(
         PlatformType.BROWSER,
         AdapterConfig(
@@ -140,27 +144,66 @@ def create_integration_system(
             sync_capabilities=["commands", "snippets", "quicklinks"]
         )
     )
+
+
+async def _start_services(
+    system: CrossPlatformSystem,
+    event_bus: EventBus
+) -> None:
+    """同期サービスとイベントバスを並行して開始
+    
+    Args:
+        system: 同期サービスを開始する統合システム
+        event_bus: 開始するイベントバス
+    """
+    await asyncio.gather(system.start_sync_service(), event_bus.start())
+
+
+def create_integration_system(
+    config_path: str = "integration_config.json",
+    auto_start: bool = True
+) -> CrossPlatformSystem:
+    """統合システムを作成・初期化
+    
+    Args:
+        config_path: 設定ファイルのパス
+        auto_start: 自動的に同期サービスを開始するか
+    
+    Returns:
+        CrossPlatformSystem: 初期化された統合システム
+    """
+    # 設定管理を初期化
+    config_manager = ConfigurationManager(config_path)
+    
+    # イベントバスを初期化
+    event_bus = get_event_bus()
+    
+    # 統合システムを作成
+    system = CrossPlatformSystem(config_path)
+    
+    # アダプターマネージャーを初期化
+    adapter_manager = AdapterManager()
+    
+    # デフォルトアダプター設定を登録
+    _build_default_adapters(adapter_manager)
     
     # システムにアダプターマネージャーを設定
     system.adapter_manager = adapter_manager
     
     if auto_start:
         # 非同期で開始（実際の使用時は await が必要）
-        import asyncio
+        _install_uvloop()
         try:
             loop = asyncio.get_event_loop()
             if loop.is_running():
                 # 既存のループで実行
-                asyncio.create_task(system.start_sync_service())
-                asyncio.create_task(event_bus.start())
+                loop.create_task(_start_services(system, event_bus))
             else:
                 # 新しいループで実行
-                loop.run_until_complete(system.start_sync_service())
-                loop.run_until_complete(event_bus.start())
+                loop.run_until_complete(_start_services(system, event_bus))
         except RuntimeError:
             # ループが存在しない場合は新しく作成
-            asyncio.run(system.start_sync_service())
-            asyncio.run(event_bus.start())
+            asyncio.run(_start_services(system, event_bus))
     
     return system
 
@@ -177,7 +220,6 @@ async def initialize_integration_system(
         CrossPlatformSystem: 初期化された統合システム
     """
     # 設定管理を初期化（ファイルパスを使用）
-    from pathlib import Path
     config_file = Path(config_path)
     
     # ファイルが存在する場合は削除してディレクトリとして作成
@@ -194,49 +236,24 @@ async def initialize_integration_system(
     config_manager = ConfigurationManager(config_dir)
     await config_manager.load_config()
     
-    # イベントバスを初期化・開始
+    # イベントバスを初期化
     event_bus = get_event_bus()
-    await event_bus.start()
     
-    # 統合システムを作成
+    # 統合システムを作成(読み込み済みの設定管理を使う)
     system = CrossPlatformSystem(config_path)
+    system.config_manager = config_manager
     
     # アダプターマネージャーを初期化
     adapter_manager = AdapterManager()
     
     # デフォルトアダプター設定を登録
-    adapter_manager.register_adapter_config(
-        PlatformType.BROWSER,
-        AdapterConfig(
-            platform_type=PlatformType.BROWSER,
-            connection_params={"websocket_url": "ws://localhost:8080/ws"},
-            sync_capabilities=["bookmarks", "tabs", "history"]
-        )
-    )
-    
-    adapter_manager.register_adapter_config(
-        PlatformType.OBSIDIAN,
-        AdapterConfig(
-            platform_type=PlatformType.OBSIDIAN,
-            connection_params={"vault_path": "~/Documents/Obsidian"},
-            sync_capabilities=["notes", "tags", "links"]
-        )
-    )
-    
-    adapter_manager.register_adapter_config(
-        PlatformType.RAYCAST,
-        AdapterConfig(
-            platform_type=PlatformType.RAYCAST,
-            connection_params={"extension_path": "~/Library/Application Support/com.raycast.macos/extensions"},
-            sync_capabilities=["commands", "snippets", "quicklinks"]
-        )
-    )
+    _build_default_adapters(adapter_manager)
     
     # システムにアダプターマネージャーを設定
     system.adapter_manager = adapter_manager
     
-    # 同期サービスを開始
-    await system.start_sync_service()
+    # 同期サービスとイベントバスを開始
+    await _start_services(system, event_bus)
     
     return system
 
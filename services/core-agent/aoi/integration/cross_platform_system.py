@@ -5,18 +5,49 @@
 """
 
 import asyncio
-import json
+import heapq
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, asdict
+from typing import Dict, FrozenSet, List, Optional, Any, Callable, Set, Tuple
+from dataclasses import dataclass, field
 from pathlib import Path
 import aiofiles
 import aiohttp
+import orjson
 from cryptography.fernet import Fernet
 import hashlib
-import base64
+
+
+# チェックサム計算用のシリアライズオプション(キー順を固定)
+_CHECKSUM_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+# 保持する終了済み同期操作の最大数(古いものから破棄)
+_FINISHED_OPERATION_LIMIT = 10000
+# HTTP同期で1回のリクエストにまとめる最大操作数
+_HTTP_BATCH_SIZE = 64
+# /sync/batch を受け付けるプラットフォームが登録時に申告する権限名
+# (申告のないプラットフォームには従来どおり /sync へ1件ずつ送る)
+_BATCH_SYNC_CAPABILITY = "sync_batch"
+# 同期操作キューの上限と、キューを処理するワーカー数
+# (ワーカー数は HTTP バッチが満杯になれるよう _HTTP_BATCH_SIZE に合わせる)
+_SYNC_QUEUE_SIZE = 1024
+_SYNC_WORKER_COUNT = _HTTP_BATCH_SIZE
+# 人が読む設定ファイル用のシリアライズオプション
+_FILE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def _file_digest(path: Path) -> bytes:
+    """ファイル内容の BLAKE2b ダイジェストを計算"""
+    with open(path, 'rb') as fp:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(fp, "blake2b").digest()
+        # Python 3.11 未満では 1MiB ずつ読み込んで計算する
+        digest = hashlib.blake2b()
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.digest()
 
 
 class PlatformType(Enum):
@@ -51,25 +82,33 @@ class DataType(Enum):
     NOTE = "note"
 
 
-@dataclass
+# データタイプ別に必要なアクセス権限名
+_ACCESS_CAPABILITIES = {
+    data_type: f"access_{data_type.value}" for data_type in DataType
+}
+
+
+@dataclass(slots=True)
 class PlatformInfo:
     """プラットフォーム情報"""
     platform_id: str
     platform_type: PlatformType
     version: str
-    capabilities: List[str]
+    capabilities: FrozenSet[str]
     last_seen: datetime
     is_active: bool
     endpoint_url: Optional[str] = None
     auth_token: Optional[str] = None
     metadata: Dict[str, Any] = None
+    # last_seen と同じ時点の time.monotonic() (経過時間の判定用)
+    last_seen_monotonic: float = field(default_factory=time.monotonic)
 
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
 
 
-@dataclass
+@dataclass(slots=True)
 class SyncData:
     """同期データ"""
     data_id: str
@@ -81,13 +120,15 @@ class SyncData:
     checksum: str
     encryption_key: Optional[str] = None
     metadata: Dict[str, Any] = None
+    # False の場合 content は暗号化せず平文のまま保持している
+    encrypt_at_rest: bool = True
 
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
 
 
-@dataclass
+@dataclass(slots=True)
 class SyncOperation:
     """同期操作"""
     operation_id: str
@@ -117,14 +158,41 @@ class CrossPlatformSystem:
     def __init__(self, config_path: str = "config/cross_platform.json"):
         self.config_path = Path(config_path)
         self.platforms: Dict[str, PlatformInfo] = {}
+        # アクティブなプラットフォームIDの集合(同期先の算出用)
+        self._active_platform_ids: Set[str] = set()
         self.sync_data_store: Dict[str, SyncData] = {}
         self.sync_operations: Dict[str, SyncOperation] = {}
+        # 未完了 (PENDING / IN_PROGRESS) の操作ID
+        self._pending_ops: Set[str] = set()
+        # リトライ待ちの操作 (次回リトライ時刻(monotonic), 操作ID) のヒープ
+        self._retry_heap: List[Tuple[float, str]] = []
+        # リトライ時に再送する、前回失敗したターゲット(操作ID別)
+        self._retry_targets: Dict[str, List[str]] = {}
+        # 終了済みの操作ID (古い順、上限を超えたら sync_operations から破棄)
+        self._finished_ops: "OrderedDict[str, None]" = OrderedDict()
+        # 検証済みの (暗号文ダイジェスト, チェックサム) (整合性チェックの復号省略用)
+        self._verified_digests: Dict[str, Tuple[bytes, str]] = {}
         self.encryption_key = self._generate_encryption_key()
         self.conflict_strategy = ConflictResolutionStrategy.LATEST_WINS
         self.sync_interval = 30  # seconds
         self.is_running = False
         self._sync_task: Optional[asyncio.Task] = None
         self._event_handlers: Dict[str, List[Callable]] = {}
+        # HTTP同期で共有するセッション(接続プールを再利用する)
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        # プラットフォーム別の送信待ち (ペイロード, 結果を受け取る Future)
+        self._outbox: Dict[
+            str, List[Tuple[Dict[str, Any], "asyncio.Future[bool]"]]
+        ] = {}
+        self._outbox_events: Dict[str, asyncio.Event] = {}
+        self._outbox_tasks: Dict[str, asyncio.Task] = {}
+        # 非同期に実行する同期操作のキューと、それを処理するワーカー
+        self._sync_queue: "asyncio.Queue[str]" = asyncio.Queue(
+            maxsize=_SYNC_QUEUE_SIZE
+        )
+        self._sync_workers: List[asyncio.Task] = []
+        # 停止で実行中に中断され、再開時にキューへ戻す操作ID
+        self._interrupted_ops: List[str] = []
         # 設定管理システム
         from .integration_config import ConfigurationManager
         
@@ -148,10 +216,41 @@ class CrossPlatformSystem:
         key = Fernet.generate_key()
         return Fernet(key)
 
+    def _serialize(self, data: Dict[str, Any]) -> bytes:
+        """データを正規化したバイト列に変換(チェックサムと暗号化で共用)"""
+        return orjson.dumps(data, option=_CHECKSUM_OPTIONS)
+
+    def _checksum_payload(self, payload: bytes) -> str:
+        """シリアライズ済みデータのチェックサムを計算
+        
+        変更検出用のため暗号学的な強度は不要で、高速な BLAKE2b を使う
+        """
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
     def _calculate_data_checksum(self, data: Dict[str, Any]) -> str:
-        """データのチェックサムを計算"""
-        data_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
-        return hashlib.sha256(data_str.encode()).hexdigest()
+        """データのチェックサムを計算
+        
+        トップレベルの要素ごとにシリアライズしてハッシュへ追加するため、
+        大きなデータでも全体のバイト列を一度に保持しない。ハッシュする
+        バイト列は _serialize の結果と同一で、_checksum_payload と同じ
+        値になる
+        """
+        if not isinstance(data, dict) or any(
+            type(key) is not str for key in data
+        ):
+            # 文字列以外のキーは orjson 側の変換・整列に合わせる必要がある
+            return self._checksum_payload(self._serialize(data))
+        
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(b"{")
+        for index, key in enumerate(sorted(data)):
+            if index:
+                digest.update(b",")
+            digest.update(orjson.dumps(key))
+            digest.update(b":")
+            digest.update(orjson.dumps(data[key], option=_CHECKSUM_OPTIONS))
+        digest.update(b"}")
+        return digest.hexdigest()
 
     async def register_platform(
         self,
@@ -169,7 +268,7 @@ class CrossPlatformSystem:
             platform_id=platform_id,
             platform_type=platform_type,
             version=version,
-            capabilities=capabilities,
+            capabilities=frozenset(capabilities),
             last_seen=datetime.now(),
             is_active=True,
             endpoint_url=endpoint_url,
@@ -178,6 +277,7 @@ class CrossPlatformSystem:
         )
         
         self.platforms[platform_id] = platform_info
+        self._active_platform_ids.add(platform_id)
         await self._save_platform_config()
         
         # プラットフォーム登録イベントを発火
@@ -193,6 +293,7 @@ class CrossPlatformSystem:
         if platform_id in self.platforms:
             platform_info = self.platforms[platform_id]
             platform_info.is_active = False
+            self._active_platform_ids.discard(platform_id)
             
             # プラットフォーム登録解除イベントを発火
             await self._emit_event("platform_unregistered", {
@@ -201,6 +302,7 @@ class CrossPlatformSystem:
             })
             
             del self.platforms[platform_id]
+            self._stop_outbox(platform_id)
             await self._save_platform_config()
             return True
         return False
@@ -215,35 +317,38 @@ class CrossPlatformSystem:
         """データを同期"""
         data_id = str(uuid.uuid4())
         
-        # データの暗号化
-        encrypted_content = self._encrypt_data(content)
-        checksum = self._calculate_data_checksum(content)
+        if target_platforms is None:
+            target_platforms = list(
+                self._active_platform_ids - {source_platform}
+            )
+        
+        # データの暗号化(シリアライズは1回だけ行い、チェックサムと共用)
+        payload = self._serialize(content)
+        encrypt_at_rest = self._requires_encryption(target_platforms)
+        stored_content = self._store_payload(payload, encrypt_at_rest)
+        checksum = self._checksum_payload(payload)
         
         sync_data = SyncData(
             data_id=data_id,
             data_type=data_type,
-            content=encrypted_content,
+            content=stored_content,
             version=1,
             timestamp=datetime.now(),
             source_platform=source_platform,
-            checksum=checksum
+            checksum=checksum,
+            encrypt_at_rest=encrypt_at_rest
         )
         
         self.sync_data_store[data_id] = sync_data
+        self._remember_verified(data_id, sync_data)
         
         # 同期操作を作成
-        if target_platforms is None:
-            target_platforms = [
-                pid for pid in self.platforms.keys() 
-                if pid != source_platform and self.platforms[pid].is_active
-            ]
-        
         operation_id = await self._create_sync_operation(
             data_id, "create", source_platform, target_platforms
         )
         
-        # 非同期で同期実行
-        asyncio.create_task(self._execute_sync_operation(operation_id))
+        # 同期実行
+        await self._dispatch_sync_operation(operation_id, target_platforms)
         
         return data_id
 
@@ -263,7 +368,11 @@ class CrossPlatformSystem:
             return None
         
         # データを復号化
-        decrypted_content = self._decrypt_data(sync_data.content)
+        decrypted_content = self._read_content(sync_data)
+        if not sync_data.encrypt_at_rest:
+            # 平文で保持している場合は、呼び出し元の変更が保持中のデータと
+            # チェックサムに及ばないよう、復号時と同じく新しいオブジェクトを返す
+            decrypted_content = orjson.loads(orjson.dumps(decrypted_content))
         
         return {
             "data_id": data_id,
@@ -291,27 +400,28 @@ class CrossPlatformSystem:
             await self._handle_conflict(data_id, content, source_platform)
             return False
         
-        # データを更新
-        encrypted_content = self._encrypt_data(content)
-        checksum = self._calculate_data_checksum(content)
+        target_platforms = list(self._active_platform_ids - {source_platform})
+        
+        # データを更新(シリアライズは1回だけ行い、チェックサムと共用)
+        payload = self._serialize(content)
+        encrypt_at_rest = self._requires_encryption(target_platforms)
+        stored_content = self._store_payload(payload, encrypt_at_rest)
+        checksum = self._checksum_payload(payload)
         
-        existing_data.content = encrypted_content
+        existing_data.content = stored_content
         existing_data.version += 1
         existing_data.timestamp = datetime.now()
         existing_data.checksum = checksum
+        existing_data.encrypt_at_rest = encrypt_at_rest
+        self._remember_verified(data_id, existing_data)
         
         # 同期操作を作成
-        target_platforms = [
-            pid for pid in self.platforms.keys() 
-            if pid != source_platform and self.platforms[pid].is_active
-        ]
-        
         operation_id = await self._create_sync_operation(
             data_id, "update", source_platform, target_platforms
         )
         
-        # 非同期で同期実行
-        asyncio.create_task(self._execute_sync_operation(operation_id))
+        # 同期実行
+        await self._dispatch_sync_operation(operation_id, target_platforms)
         
         return True
 
@@ -321,20 +431,18 @@ class CrossPlatformSystem:
             return False
         
         # 同期操作を作成
-        target_platforms = [
-            pid for pid in self.platforms.keys() 
-            if pid != source_platform and self.platforms[pid].is_active
-        ]
+        target_platforms = list(self._active_platform_ids - {source_platform})
         
         operation_id = await self._create_sync_operation(
             data_id, "delete", source_platform, target_platforms
         )
         
-        # 非同期で同期実行
-        asyncio.create_task(self._execute_sync_operation(operation_id))
+        # 同期実行
+        await self._dispatch_sync_operation(operation_id, target_platforms)
         
         # ローカルデータを削除
         del self.sync_data_store[data_id]
+        self._verified_digests.pop(data_id, None)
         
         return True
 
@@ -344,6 +452,12 @@ class CrossPlatformSystem:
             return
         
         self.is_running = True
+        self._get_http_session()
+        self._start_sync_workers()
+        # 前回の停止で中断された操作を先に実行し直す
+        interrupted, self._interrupted_ops = self._interrupted_ops, []
+        for operation_id in interrupted:
+            await self._enqueue_sync_operation(operation_id)
         self._sync_task = asyncio.create_task(self._sync_loop())
         
         await self._emit_event("sync_service_started", {})
@@ -362,6 +476,23 @@ class CrossPlatformSystem:
             except asyncio.CancelledError:
                 pass
         
+        # キューに残った操作は PENDING のまま保持し、再開時に処理する
+        # (実行中だった操作はワーカーが PENDING に戻して再開時に積み直す)
+        for worker in self._sync_workers:
+            worker.cancel()
+        await asyncio.gather(*self._sync_workers, return_exceptions=True)
+        self._sync_workers = []
+        
+        for platform_id in list(self._outbox_tasks):
+            self._stop_outbox(platform_id)
+        
+        if self._http_session:
+            await self._http_session.close()
+            self._http_session = None
+        
+        # 遅延中の設定変更を書き出す
+        await self.config_manager.close()
+        
         await self._emit_event("sync_service_stopped", {})
 
     def add_event_handler(self, event_type: str, handler: Callable) -> None:
@@ -380,20 +511,11 @@ class CrossPlatformSystem:
 
     async def get_sync_status(self) -> Dict[str, Any]:
         """同期ステータスを取得"""
-        active_platforms = [
-            p for p in self.platforms.values() if p.is_active
-        ]
-        
-        pending_operations = [
-            op for op in self.sync_operations.values() 
-            if op.status in [SyncStatus.PENDING, SyncStatus.IN_PROGRESS]
-        ]
-        
         return {
             "is_running": self.is_running,
-            "active_platforms": len(active_platforms),
+            "active_platforms": len(self._active_platform_ids),
             "total_data_items": len(self.sync_data_store),
-            "pending_operations": len(pending_operations),
+            "pending_operations": len(self._pending_ops),
             "last_sync": datetime.now().isoformat(),
             "platforms": [
                 {
@@ -409,22 +531,83 @@ class CrossPlatformSystem:
 
     # プライベートメソッド
     
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """HTTP同期用の共有セッションを取得(未作成なら作成)"""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=0,
+                    limit_per_host=32,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                ),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._http_session
+    
     def _encrypt_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """データを暗号化"""
-        data_str = json.dumps(data, ensure_ascii=False)
-        encrypted_bytes = self.encryption_key.encrypt(data_str.encode())
+        return self._encrypt_payload(self._serialize(data))
+
+    def _encrypt_payload(self, payload: bytes) -> Dict[str, Any]:
+        """シリアライズ済みデータを暗号化"""
+        # Fernet トークンは URL-safe base64 のため、そのまま文字列で保持する
+        token = self.encryption_key.encrypt(payload)
         return {
-            "encrypted": base64.b64encode(encrypted_bytes).decode(),
+            "encrypted": token.decode("ascii"),
             "algorithm": "fernet"
         }
 
+    def _requires_encryption(self, target_platforms: List[str]) -> bool:
+        """同期先に HTTP 経由のプラットフォームが含まれるかを判定
+        
+        ローカルファイルシステムにしか書き出さないデータは同じマシン上に
+        留まるため、暗号化しても保護にならない
+        """
+        return any(
+            self.platforms[pid].endpoint_url
+            for pid in target_platforms if pid in self.platforms
+        )
+
+    def _store_payload(
+        self, 
+        payload: bytes, 
+        encrypt_at_rest: bool
+    ) -> Dict[str, Any]:
+        """シリアライズ済みデータを保持用の content に変換"""
+        if encrypt_at_rest:
+            return self._encrypt_payload(payload)
+        # 呼び出し元の辞書を共有しないよう、シリアライズ結果から復元する
+        return orjson.loads(payload)
+
+    def _read_content(self, sync_data: SyncData) -> Dict[str, Any]:
+        """保持している content を平文で取得"""
+        if not sync_data.encrypt_at_rest:
+            return sync_data.content
+        return self._decrypt_data(sync_data.content)
+
+    def _ciphertext_digest(self, encrypted_data: Dict[str, Any]) -> bytes:
+        """暗号文のダイジェストを計算(復号せずに変更を検出する)"""
+        return hashlib.blake2b(
+            encrypted_data["encrypted"].encode(), digest_size=16
+        ).digest()
+
+    def _remember_verified(self, data_id: str, sync_data: SyncData) -> None:
+        """同じ平文から作った暗号文とチェックサムを検証済みとして記録"""
+        if not sync_data.encrypt_at_rest:
+            # 平文で保持している場合は暗号文による省略判定を行わない
+            self._verified_digests.pop(data_id, None)
+            return
+        self._verified_digests[data_id] = (
+            self._ciphertext_digest(sync_data.content), sync_data.checksum
+        )
+
     def _decrypt_data(self, encrypted_data: Dict[str, Any]) -> Dict[str, Any]:
         """データを復号化"""
-        encrypted_bytes = base64.b64decode(
-            encrypted_data["encrypted"].encode()
+        decrypted_bytes = self.encryption_key.decrypt(
+            encrypted_data["encrypted"]
         )
-        decrypted_bytes = self.encryption_key.decrypt(encrypted_bytes)
-        return json.loads(decrypted_bytes.decode())
+        return orjson.loads(decrypted_bytes)
 
     async def _check_access_permission(
         self, 
@@ -441,7 +624,7 @@ class CrossPlatformSystem:
             return False
         
         # データタイプ別のアクセス制御
-        required_capability = f"access_{sync_data.data_type.value}"
+        required_capability = _ACCESS_CAPABILITIES[sync_data.data_type]
         return required_capability in platform.capabilities
 
     async def _check_conflict(
@@ -489,6 +672,7 @@ class CrossPlatformSystem:
     ) -> str:
         """同期操作を作成"""
         operation_id = str(uuid.uuid4())
+        now = datetime.now()
         
         operation = SyncOperation(
             operation_id=operation_id,
@@ -497,13 +681,86 @@ class CrossPlatformSystem:
             source_platform=source_platform,
             target_platforms=target_platforms,
             status=SyncStatus.PENDING,
-            created_at=datetime.now(),
-            updated_at=datetime.now()
+            created_at=now,
+            updated_at=now
         )
         
         self.sync_operations[operation_id] = operation
+        self._pending_ops.add(operation_id)
         return operation_id
 
+    def _track_operation_result(self, operation: SyncOperation) -> None:
+        """終了した操作をリトライ待ちか終了済みとして記録"""
+        operation_id = operation.operation_id
+        self._pending_ops.discard(operation_id)
+        
+        if (operation.status == SyncStatus.FAILED and
+                operation.retry_count < operation.max_retries):
+            # 指数バックオフで次回リトライ時刻を決める
+            next_retry = time.monotonic() + 2 ** operation.retry_count
+            heapq.heappush(self._retry_heap, (next_retry, operation_id))
+            return
+        
+        self._retry_targets.pop(operation_id, None)
+        self._finished_ops[operation_id] = None
+        while len(self._finished_ops) > _FINISHED_OPERATION_LIMIT:
+            expired_id, _ = self._finished_ops.popitem(last=False)
+            self.sync_operations.pop(expired_id, None)
+
+    async def _dispatch_sync_operation(
+        self,
+        operation_id: str,
+        target_platforms: List[str]
+    ) -> None:
+        """同期操作を実行
+        
+        ターゲットがローカル(ファイルシステム)の1件以下であればその場で
+        実行し、それ以外はタスクとして非同期に実行する
+        """
+        if len(target_platforms) <= 1 and not any(
+            self.platforms[pid].endpoint_url
+            for pid in target_platforms if pid in self.platforms
+        ):
+            await self._execute_sync_operation(operation_id)
+        else:
+            await self._enqueue_sync_operation(operation_id)
+
+    def _start_sync_workers(self) -> None:
+        """同期操作キューのワーカーを起動(稼働中なら何もしない)"""
+        if any(not worker.done() for worker in self._sync_workers):
+            return
+        self._sync_workers = [
+            asyncio.create_task(self._sync_worker())
+            for _ in range(_SYNC_WORKER_COUNT)
+        ]
+
+    async def _enqueue_sync_operation(self, operation_id: str) -> None:
+        """同期操作をキューに追加(満杯の場合は空きが出るまで待機)"""
+        self._start_sync_workers()
+        await self._sync_queue.put(operation_id)
+
+    async def _sync_worker(self) -> None:
+        """キューから同期操作を取り出して実行するワーカー"""
+        while True:
+            operation_id = await self._sync_queue.get()
+            try:
+                await self._execute_sync_operation(operation_id)
+            except asyncio.CancelledError:
+                self._interrupt_operation(operation_id)
+                raise
+            finally:
+                self._sync_queue.task_done()
+
+    def _interrupt_operation(self, operation_id: str) -> None:
+        """実行中に中断された操作を PENDING に戻し、再開時の実行に回す"""
+        operation = self.sync_operations.get(operation_id)
+        if operation is None or operation.status != SyncStatus.IN_PROGRESS:
+            return
+        operation.status = SyncStatus.PENDING
+        operation.updated_at = datetime.now()
+        self._pending_ops.add(operation_id)
+        self._interrupted_ops.append(operation_id)
+
     async def _execute_sync_operation(self, operation_id: str) -> None:
         """同期操作を実行"""
         if operation_id not in self.sync_operations:
@@ -511,43 +768,56 @@ class CrossPlatformSystem:
         
         operation = self.sync_operations[operation_id]
         operation.status = SyncStatus.IN_PROGRESS
+        self._pending_ops.add(operation_id)
         operation.updated_at = datetime.now()
         
         try:
-            for target_platform in operation.target_platforms:
-                if target_platform not in self.platforms:
-                    continue
-                
-                platform = self.platforms[target_platform]
-                if not platform.is_active:
-                    continue
-                
-                # プラットフォーム固有の同期ロジック
-                success = await self._sync_to_platform(
-                    operation, platform
+            # リトライ時は前回失敗したターゲットだけに送る
+            targets = [
+                target_platform
+                for target_platform in self._retry_targets.get(
+                    operation_id, operation.target_platforms
                 )
-                
-                if not success:
-                    operation.retry_count += 1
-                    if operation.retry_count >= operation.max_retries:
-                        operation.status = SyncStatus.FAILED
-                        operation.error_message = (
-                            f"Failed to sync to {target_platform}"
-                        )
-                        break
-                    else:
-                        # リトライのために少し待機
-                        await asyncio.sleep(2 ** operation.retry_count)
-                        continue
+                if target_platform in self.platforms
+                and self.platforms[target_platform].is_active
+            ]
             
-            if operation.status != SyncStatus.FAILED:
+            # 各プラットフォームへの同期は並行に実行する
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(self._sync_to_platform(
+                        operation, self.platforms[target_platform]
+                    ))
+                    for target_platform in targets
+                ]
+            
+            failed_targets = [
+                target_platform
+                for target_platform, task in zip(targets, tasks)
+                if not task.result()
+            ]
+            
+            if failed_targets:
+                # 失敗したターゲットは1回の試行として数え、リトライヒープで
+                # バックオフ後に再送する
+                operation.retry_count += 1
+                operation.status = SyncStatus.FAILED
+                operation.error_message = (
+                    f"Failed to sync to {', '.join(failed_targets)}"
+                )
+                self._retry_targets[operation_id] = failed_targets
+            else:
                 operation.status = SyncStatus.COMPLETED
+                operation.error_message = None
             
         except Exception as e:
+            # 例外で失敗した試行もリトライ回数に数える
+            operation.retry_count += 1
             operation.status = SyncStatus.FAILED
             operation.error_message = str(e)
         
         operation.updated_at = datetime.now()
+        self._track_operation_result(operation)
         
         # 同期完了イベントを発火
         await self._emit_event("sync_operation_completed", {
@@ -577,11 +847,11 @@ class CrossPlatformSystem:
         operation: SyncOperation, 
         platform: PlatformInfo
     ) -> bool:
-        """HTTP API経由での同期"""
-        headers = {}
-        if platform.auth_token:
-            headers["Authorization"] = f"Bearer {platform.auth_token}"
+        """HTTP API経由での同期
         
+        操作はプラットフォーム別の送信待ちに積まれ、同時に積まれた操作は
+        送信タスクが1回のリクエストにまとめて送る
+        """
         data_payload = {
             "operation_id": operation.operation_id,
             "data_id": operation.data_id,
@@ -589,14 +859,116 @@ class CrossPlatformSystem:
             "data": self.sync_data_store.get(operation.data_id)
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{platform.endpoint_url}/sync",
-                json=data_payload,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                return response.status == 200
+        platform_id = platform.platform_id
+        future = asyncio.get_running_loop().create_future()
+        self._outbox.setdefault(platform_id, []).append(
+            (data_payload, future)
+        )
+        
+        task = self._outbox_tasks.get(platform_id)
+        if task is None or task.done():
+            self._outbox_events[platform_id] = asyncio.Event()
+            self._outbox_tasks[platform_id] = asyncio.create_task(
+                self._drain_outbox(platform_id)
+            )
+        self._outbox_events[platform_id].set()
+        
+        return await future
+
+    async def _drain_outbox(self, platform_id: str) -> None:
+        """送信待ちの操作をまとめてプラットフォームへ送る"""
+        event = self._outbox_events[platform_id]
+        while True:
+            await event.wait()
+            event.clear()
+            
+            queue = self._outbox.get(platform_id)
+            while queue:
+                batch = queue[:_HTTP_BATCH_SIZE]
+                del queue[:_HTTP_BATCH_SIZE]
+                
+                platform = self.platforms.get(platform_id)
+                if (
+                    platform is not None and
+                    _BATCH_SYNC_CAPABILITY in platform.capabilities
+                ):
+                    groups = [batch]
+                else:
+                    # バッチ非対応の受信側には1件ずつ並行して送る
+                    groups = [[item] for item in batch]
+                await asyncio.gather(*[
+                    self._post_outbox_group(platform, group)
+                    for group in groups
+                ])
+
+    async def _post_outbox_group(
+        self,
+        platform: Optional[PlatformInfo],
+        group: List[Tuple[Dict[str, Any], "asyncio.Future[bool]"]]
+    ) -> None:
+        """送信待ちの操作を1回のリクエストで送り、待機側に結果を返す"""
+        success = False
+        try:
+            success = platform is not None and await self._post_sync(
+                platform, [payload for payload, _ in group]
+            )
+        except Exception:
+            success = False
+        finally:
+            # 送信中に停止(キャンセル)された場合も待機側を失敗で終える
+            for _, future in group:
+                if not future.done():
+                    future.set_result(success)
+
+    async def _post_sync(
+        self, 
+        platform: PlatformInfo, 
+        payloads: List[Dict[str, Any]]
+    ) -> bool:
+        """同期リクエストを送信(複数操作はバッチエンドポイントへ)"""
+        if len(payloads) > 1:
+            status = await self._post_json(
+                platform, "/sync/batch", {"ops": payloads}
+            )
+            if status not in (404, 405):
+                return status == 200
+            # バッチエンドポイントがなければ /sync へ1件ずつ送り直す
+        
+        statuses = await asyncio.gather(*[
+            self._post_json(platform, "/sync", payload)
+            for payload in payloads
+        ])
+        return all(status == 200 for status in statuses)
+
+    async def _post_json(
+        self,
+        platform: PlatformInfo,
+        path: str,
+        body: Dict[str, Any]
+    ) -> int:
+        """プラットフォームへ JSON を POST し、ステータスコードを返す"""
+        headers = {"Content-Type": "application/json"}
+        if platform.auth_token:
+            headers["Authorization"] = f"Bearer {platform.auth_token}"
+        
+        session = self._get_http_session()
+        async with session.post(
+            f"{platform.endpoint_url}{path}",
+            data=orjson.dumps(body),
+            headers=headers
+        ) as response:
+            return response.status
+
+    def _stop_outbox(self, platform_id: str) -> None:
+        """プラットフォームの送信タスクを停止し、送信待ちを失敗させる"""
+        task = self._outbox_tasks.pop(platform_id, None)
+        if task:
+            task.cancel()
+        self._outbox_events.pop(platform_id, None)
+        
+        for _, future in self._outbox.pop(platform_id, []):
+            if not future.done():
+                future.set_result(False)
 
     async def _sync_via_filesystem(
         self, 
@@ -619,11 +991,18 @@ class CrossPlatformSystem:
         if not sync_data:
             return False
         
-        data_dict = asdict(sync_data)
-        data_dict["timestamp"] = sync_data.timestamp.isoformat()
+        # orjson はデータクラスを直接シリアライズできるため asdict の
+        # 再帰コピーは不要(Enum は値、datetime は ISO 形式で出力される)
+        payload = orjson.dumps(sync_data, option=orjson.OPT_NON_STR_KEYS)
+        
+        # 同じ内容が既に書き込まれていれば書き込みを省略
+        if file_path.exists():
+            existing_digest = await asyncio.to_thread(_file_digest, file_path)
+            if existing_digest == hashlib.blake2b(payload).digest():
+                return True
         
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(data_dict, ensure_ascii=False, indent=2))
+        async with aiofiles.open(file_path, 'wb') as f:
+            await f.write(payload)
         
         return True
 
@@ -631,11 +1010,14 @@ class CrossPlatformSystem:
         """同期ループ"""
         while self.is_running:
             try:
+                # 時刻は1周につき1回だけ取得して各チェックで共有する
+                now = time.monotonic()
+                
                 # プラットフォームのヘルスチェック
-                await self._health_check_platforms()
+                await self._health_check_platforms(now)
                 
                 # 失敗した操作のリトライ
-                await self._retry_failed_operations()
+                await self._retry_failed_operations(now)
                 
                 # 定期的なデータ整合性チェック
                 await self._check_data_integrity()
@@ -649,46 +1031,61 @@ class CrossPlatformSystem:
                 })
                 await asyncio.sleep(5)  # エラー時は短い間隔で再試行
 
-    async def _health_check_platforms(self) -> None:
-        """プラットフォームのヘルスチェック"""
-        for platform in self.platforms.values():
+    async def _health_check_platforms(
+        self, 
+        now: Optional[float] = None
+    ) -> None:
+        """プラットフォームのヘルスチェック(now は time.monotonic() の値)"""
+        # 最後に見た時間から一定時間(5分)経過していたら非アクティブに
+        threshold = (time.monotonic() if now is None else now) - 300
+        for platform in list(self.platforms.values()):
             if not platform.is_active:
                 continue
             
-            # 最後に見た時間から一定時間経過していたら非アクティブに
-            time_diff = (datetime.now() - platform.last_seen).seconds
-            if time_diff > 300:  # 5分
+            if platform.last_seen_monotonic < threshold:
                 platform.is_active = False
+                self._active_platform_ids.discard(platform.platform_id)
                 await self._emit_event("platform_inactive", {
                     "platform_id": platform.platform_id,
                     "platform_type": platform.platform_type.value
                 })
 
-    async def _retry_failed_operations(self) -> None:
-        """失敗した操作をリトライ"""
-        failed_operations = [
-            op for op in self.sync_operations.values()
-            if op.status == SyncStatus.FAILED and 
-            op.retry_count < op.max_retries
-        ]
-        
-        for operation in failed_operations:
-            # 指数バックオフでリトライ
-            wait_time = 2 ** operation.retry_count
-            time_since_update = (
-                datetime.now() - operation.updated_at
-            ).seconds
-            if time_since_update >= wait_time:
-                asyncio.create_task(
-                    self._execute_sync_operation(operation.operation_id)
-                )
+    async def _retry_failed_operations(
+        self, 
+        now: Optional[float] = None
+    ) -> None:
+        """失敗した操作をリトライ(now は time.monotonic() の値)"""
+        # リトライ時刻を過ぎた操作だけをヒープの先頭から取り出す
+        if now is None:
+            now = time.monotonic()
+        while self._retry_heap and self._retry_heap[0][0] <= now:
+            _, operation_id = heapq.heappop(self._retry_heap)
+            operation = self.sync_operations.get(operation_id)
+            if (operation is None or
+                    operation.status != SyncStatus.FAILED or
+                    operation.retry_count >= operation.max_retries):
+                continue
+            
+            self._pending_ops.add(operation_id)
+            await self._enqueue_sync_operation(operation_id)
 
     async def _check_data_integrity(self) -> None:
         """データ整合性をチェック"""
         # チェックサムの検証
-        for data_id, sync_data in self.sync_data_store.items():
+        for data_id, sync_data in list(self.sync_data_store.items()):
             try:
-                decrypted_content = self._decrypt_data(sync_data.content)
+                verified = None
+                if sync_data.encrypt_at_rest:
+                    # 前回の検証から暗号文もチェックサムも変わっていなければ、
+                    # 平文も変わっていないため復号と再計算を省略する
+                    verified = (
+                        self._ciphertext_digest(sync_data.content),
+                        sync_data.checksum
+                    )
+                    if self._verified_digests.get(data_id) == verified:
+                        continue
+                
+                decrypted_content = self._read_content(sync_data)
                 calculated_checksum = self._calculate_data_checksum(
                     decrypted_content
                 )
@@ -699,6 +1096,8 @@ class CrossPlatformSystem:
                         "expected_checksum": sync_data.checksum,
                         "calculated_checksum": calculated_checksum
                     })
+                elif verified is not None:
+                    self._verified_digests[data_id] = verified
             except Exception as e:
                 await self._emit_event("data_integrity_error", {
                     "data_id": data_id,
@@ -726,7 +1125,7 @@ class CrossPlatformSystem:
                     "platform_id": p.platform_id,
                     "platform_type": p.platform_type.value,
                     "version": p.version,
-                    "capabilities": p.capabilities,
+                    "capabilities": sorted(p.capabilities),
                     "last_seen": p.last_seen.isoformat(),
                     "is_active": p.is_active,
                     "endpoint_url": p.endpoint_url,
@@ -736,13 +1135,14 @@ class CrossPlatformSystem:
             }
         }
         
+        # シリアライズはイベントループを止めないよう別スレッドで行う
+        payload = await asyncio.to_thread(
+            orjson.dumps, config_data, option=_FILE_OPTIONS
+        )
+        
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
-        async with aiofiles.open(
-            self.config_path, 'w', encoding='utf-8'
-        ) as f:
-            await f.write(
-                json.dumps(config_data, ensure_ascii=False, indent=2)
-            )
+        async with aiofiles.open(self.config_path, 'wb') as f:
+            await f.write(payload)
 
     async def load_platform_config(self) -> None:
         """プラットフォーム設定を読み込み"""
@@ -750,23 +1150,31 @@ class CrossPlatformSystem:
             return
         
         try:
-            async with aiofiles.open(
-                self.config_path, 'r', encoding='utf-8'
-            ) as f:
-                config_data = json.loads(await f.read())
+            async with aiofiles.open(self.config_path, 'rb') as f:
+                raw = await f.read()
+            # デコードはイベントループを止めないよう別スレッドで行う
+            config_data = await asyncio.to_thread(orjson.loads, raw)
             
             for pid, p_data in config_data.get("platforms", {}).items():
+                last_seen = datetime.fromisoformat(p_data["last_seen"])
+                # 保存時刻からの経過時間を monotonic 時計に換算する
+                elapsed = (datetime.now() - last_seen).total_seconds()
                 platform_info = PlatformInfo(
                     platform_id=p_data["platform_id"],
                     platform_type=PlatformType(p_data["platform_type"]),
                     version=p_data["version"],
-                    capabilities=p_data["capabilities"],
-                    last_seen=datetime.fromisoformat(p_data["last_seen"]),
+                    capabilities=frozenset(p_data["capabilities"]),
+                    last_seen=last_seen,
                     is_active=p_data["is_active"],
                     endpoint_url=p_data.get("endpoint_url"),
-                    metadata=p_data.get("metadata", {})
+                    metadata=p_data.get("metadata", {}),
+                    last_seen_monotonic=time.monotonic() - elapsed
                 )
                 self.platforms[pid] = platform_info
+                if platform_info.is_active:
+                    self._active_platform_ids.add(pid)
+                else:
+                    self._active_platform_ids.discard(pid)
                 
         except Exception as e:
             await self._emit_event("config_load_error", {
@@ -777,10 +1185,16 @@ class CrossPlatformSystem:
     async def _process_data(
         self, 
         data: Dict[str, Any], 
-        operation_type: str = "process"
+        operation_type: str = "process",
+        include_size: bool = False,
+        mutate: bool = False
     ) -> Dict[str, Any]:
-        """データを処理"""
-        processed_data = data.copy()
+        """データを処理
+        
+        include_size が真の場合のみ data_size (UTF-8 のバイト数) を付与し、
+        mutate が真の場合は呼び出し元の辞書をコピーせずにそのまま更新する
+        """
+        processed_data = data if mutate else data.copy()
         
         # データ処理のタイムスタンプを追加
         processed_data["processed_at"] = datetime.now().isoformat()
@@ -790,8 +1204,8 @@ class CrossPlatformSystem:
         if "data_type" not in processed_data:
             processed_data["data_type"] = "unknown"
         
-        # データサイズの計算
-        data_size = len(json.dumps(processed_data, ensure_ascii=False))
-        processed_data["data_size"] = data_size
+        # データサイズの計算(必要な場合のみシリアライズする)
+        if include_size:
+            processed_data["data_size"] = len(orjson.dumps(processed_data))
         
         return processed_data
\ No newline at end of file
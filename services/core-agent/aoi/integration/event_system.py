@@ -5,13 +5,31 @@
 """
 
 import asyncio
+import itertools
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
-import weakref
-from collections import defaultdict
+from collections import defaultdict, deque
+
+# 処理ループが1回に取り出すイベントの上限
+_EVENT_BATCH_SIZE = 256
+# 通常イベントを処理するワーカー数(同時に処理するバッチ数の上限)
+_EVENT_WORKER_COUNT = 8
+# リトライまでの待機時間の上限(秒)
+_MAX_RETRY_DELAY = 30
+
+
+def _datetime_from_ns(timestamp_ns: int) -> datetime:
+    """time.time_ns() の値を datetime に変換"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9)
+
+
+def _ns_from_datetime(value: datetime) -> int:
+    """datetime を time.time_ns() 相当の値に変換(マイクロ秒精度)"""
+    return round(value.timestamp() * 1e6) * 1000
 
 
 class EventType(Enum):
@@ -49,6 +67,10 @@ class EventType(Enum):
     # カスタムイベント
     CUSTOM = "custom"
 
+    # メンバーは単一のインスタンスで == も同一性で判定されるため、
+    # 名前の文字列ではなく同一性でハッシュして辞書の参照を C 実装で済ませる
+    __hash__ = object.__hash__
+
 
 class EventPriority(Enum):
     """イベント優先度"""
@@ -57,8 +79,10 @@ class EventPriority(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+    __hash__ = object.__hash__
 
-@dataclass
+
+@dataclass(slots=True)
 class Event:
     """イベントデータ"""
     id: str
@@ -67,18 +91,29 @@ class Event:
     target: Optional[str] = None  # イベント対象
     data: Dict[str, Any] = field(default_factory=dict)
     priority: EventPriority = EventPriority.NORMAL
-    timestamp: datetime = field(default_factory=datetime.now)
+    # 発行時刻(time.time_ns())。datetime への変換は参照時まで遅らせる
+    timestamp_ns: int = field(default_factory=time.time_ns)
     correlation_id: Optional[str] = None  # 関連イベントのグループ化
     retry_count: int = 0
     max_retries: int = 3
     expires_at: Optional[datetime] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # expires_at を time.monotonic_ns() 基準に換算した期限
+    _deadline_ns: Optional[int] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self):
-        if isinstance(self.timestamp, str):
-            self.timestamp = datetime.fromisoformat(self.timestamp)
         if isinstance(self.expires_at, str):
             self.expires_at = datetime.fromisoformat(self.expires_at)
+        if self.expires_at is not None:
+            remaining_ns = _ns_from_datetime(self.expires_at) - time.time_ns()
+            self._deadline_ns = time.monotonic_ns() + remaining_ns
+
+    @property
+    def timestamp(self) -> datetime:
+        """発行時刻"""
+        return _datetime_from_ns(self.timestamp_ns)
 
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式に変換"""
@@ -105,6 +140,11 @@ class Event:
         data = data.copy()
         data["type"] = EventType(data["type"])
         data["priority"] = EventPriority(data["priority"])
+        timestamp = data.pop("timestamp", None)
+        if timestamp is not None:
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            data["timestamp_ns"] = _ns_from_datetime(timestamp)
         return cls(**data)
 
 
@@ -116,7 +156,9 @@ class EventHandler:
         self.is_active = True
         self.handled_count = 0
         self.error_count = 0
-        self.last_handled = None
+        self._last_handled_ns: Optional[int] = None
+        # 有効/無効の切り替えを通知する先(登録先イベントバスのキャッシュ破棄)
+        self._state_listeners: Set[Callable[['EventHandler'], None]] = set()
     
     async def handle(self, event: Event) -> bool:
         """イベントを処理
@@ -131,7 +173,7 @@ class EventHandler:
             result = await self._handle_event(event)
             if result:
                 self.handled_count += 1
-                self.last_handled = datetime.now()
+                self._last_handled_ns = time.time_ns()
             else:
                 self.error_count += 1
             
@@ -145,13 +187,29 @@ class EventHandler:
         """実際のイベント処理（サブクラスで実装）"""
         raise NotImplementedError
     
+    @property
+    def last_handled(self) -> Optional[datetime]:
+        """最後にイベントを処理した時刻"""
+        if self._last_handled_ns is None:
+            return None
+        return _datetime_from_ns(self._last_handled_ns)
+    
     def activate(self):
         """ハンドラーを有効化"""
-        self.is_active = True
+        if not self.is_active:
+            self.is_active = True
+            self._notify_state_change()
     
     def deactivate(self):
         """ハンドラーを無効化"""
-        self.is_active = False
+        if self.is_active:
+            self.is_active = False
+            self._notify_state_change()
+    
+    def _notify_state_change(self):
+        """有効/無効の変更を登録先に通知"""
+        for listener in tuple(self._state_listeners):
+            listener(self)
     
     def get_stats(self) -> Dict[str, Any]:
         """統計情報を取得"""
@@ -172,10 +230,12 @@ class FunctionEventHandler(EventHandler):
     def __init__(self, handler_id: str, handler_func: Callable[[Event], bool]):
         super().__init__(handler_id)
         self.handler_func = handler_func
+        # コルーチン関数かどうかは登録時に1回だけ判定する
+        self._is_coroutine = asyncio.iscoroutinefunction(handler_func)
     
     async def _handle_event(self, event: Event) -> bool:
         """関数を呼び出してイベントを処理"""
-        if asyncio.iscoroutinefunction(self.handler_func):
+        if self._is_coroutine:
             return await self.handler_func(event)
         else:
             return self.handler_func(event)
@@ -188,16 +248,34 @@ class EventBus:
         self.max_queue_size = max_queue_size
         
         # イベントキューと処理
-        self.event_queue: asyncio.Queue = asyncio.Queue(
-            maxsize=max_queue_size
-        )
-        self.processing_task: Optional[asyncio.Task] = None
+        # (キューが空でなくなったことを Event で処理ループに通知する。
+        #  クリティカルイベントは別キューにして通常イベントを待たせない)
+        self.event_queue: deque = deque()
+        self._queue_ready = asyncio.Event()
+        self.critical_queue: deque = deque()
+        self._critical_ready = asyncio.Event()
+        self.processing_tasks: List[asyncio.Task] = []
         self.is_running = False
         
         # ハンドラー管理
         self.handlers: Dict[EventType, List[EventHandler]] = defaultdict(list)
         self.global_handlers: List[EventHandler] = []
-        self.handler_refs: Dict[str, weakref.ref] = {}
+        # ハンドラーID -> 登録先(グローバルは None)とハンドラーの一覧
+        self._handler_index: Dict[
+            str, List[Tuple[Optional[EventType], EventHandler]]
+        ] = defaultdict(list)
+        self._active_handler_count = 0
+        # イベントタイプごとの有効なハンドラー一覧(登録状態の変更で破棄)
+        self._dispatch_cache: Dict[EventType, Tuple[EventHandler, ...]] = {}
+        # wait_for_event の待機者(Future と条件)。ハンドラーとしては登録しない
+        self._waiters: Dict[
+            EventType,
+            List[Tuple[asyncio.Future, Optional[Callable[[Event], bool]]]]
+        ] = {}
+        # emit_and_wait の応答待ち(相関ID -> 応答のイベントタイプと Future)
+        self._correlation_waiters: Dict[
+            str, Tuple[EventType, asyncio.Future]
+        ] = {}
         
         # 統計情報
         self.stats = {
@@ -209,16 +287,17 @@ class EventBus:
             "handlers_active": 0
         }
         
-        # イベント履歴（デバッグ用）
-        self.event_history: List[Event] = []
+        # イベント履歴（デバッグ用、上限を超えた古いものから破棄）
         self.max_history_size = 1000
+        self.event_history: deque = deque(maxlen=self.max_history_size)
         
         # フィルター
         self.event_filters: List[Callable[[Event], bool]] = []
+        # 全フィルターをまとめた判定関数(フィルターが無ければ None)
+        self._filter_chain: Optional[Callable[[Event], bool]] = None
         
-        # リトライ設定
-        self.retry_queue: asyncio.Queue = asyncio.Queue()
-        self.retry_task: Optional[asyncio.Task] = None
+        # リトライ設定(イベントごとのタイマー。キーは id(event))
+        self._retry_handles: Dict[int, asyncio.TimerHandle] = {}
     
     async def start(self):
         """イベントバスを開始"""
@@ -226,15 +305,20 @@ class EventBus:
             return
         
         self.is_running = True
-        self.processing_task = asyncio.create_task(self._process_events())
-        self.retry_task = asyncio.create_task(self._process_retries())
+        self.processing_tasks = [
+            asyncio.create_task(self._process_critical_events()),
+            *(
+                asyncio.create_task(self._process_events())
+                for _ in range(_EVENT_WORKER_COUNT)
+            )
+        ]
         
         # システム開始イベントを発行
         await self.publish(Event(
             id=str(uuid.uuid4()),
             type=EventType.SYSTEM_STARTED,
             source="event_bus",
-            data={"timestamp": datetime.now().isoformat()}
+            data={"timestamp": time.time()}
         ))
     
     async def stop(self):
@@ -247,25 +331,21 @@ class EventBus:
             id=str(uuid.uuid4()),
             type=EventType.SYSTEM_STOPPED,
             source="event_bus",
-            data={"timestamp": datetime.now().isoformat()}
+            data={"timestamp": time.time()}
         ))
         
         self.is_running = False
         
         # 処理中のタスクを停止
-        if self.processing_task:
-            self.processing_task.cancel()
-            try:
-                await self.processing_task
-            except asyncio.CancelledError:
-                pass
+        for task in self.processing_tasks:
+            task.cancel()
+        await asyncio.gather(*self.processing_tasks, return_exceptions=True)
+        self.processing_tasks = []
         
-        if self.retry_task:
-            self.retry_task.cancel()
-            try:
-                await self.retry_task
-            except asyncio.CancelledError:
-                pass
+        # 待機中のリトライを取り消す
+        for handle in self._retry_handles.values():
+            handle.cancel()
+        self._retry_handles.clear()
     
     async def publish(self, event: Event) -> bool:
         """イベントを発行"""
@@ -273,27 +353,39 @@ class EventBus:
             return False
         
         # フィルターをチェック
-        for filter_func in self.event_filters:
-            if not filter_func(event):
-                return False
+        filter_chain = self._filter_chain
+        if filter_chain is not None and not filter_chain(event):
+            return False
         
         # 期限切れチェック
-        if event.expires_at and event.expires_at < datetime.now():
+        deadline_ns = event._deadline_ns
+        if deadline_ns is not None and deadline_ns < time.monotonic_ns():
+            self.stats["events_dropped"] += 1
             return False
         
-        try:
-            # キューに追加（ノンブロッキング）
-            self.event_queue.put_nowait(event)
-            self.stats["events_published"] += 1
-            
-            # 履歴に追加
-            self._add_to_history(event)
-            
-            return True
-            
-        except asyncio.QueueFull:
+        # キューが満杯なら破棄(max_queue_size が 0 以下なら上限なし)
+        queue_size = len(self.event_queue) + len(self.critical_queue)
+        if 0 < self.max_queue_size <= queue_size:
             self.stats["events_dropped"] += 1
             return False
+        
+        # キューに追加（ノンブロッキング）
+        self._enqueue(event)
+        self.stats["events_published"] += 1
+        
+        # 履歴に追加
+        self._add_to_history(event)
+        
+        return True
+    
+    def _enqueue(self, event: Event):
+        """優先度に応じたキューにイベントを追加"""
+        if event.priority is EventPriority.CRITICAL:
+            self.critical_queue.append(event)
+            self._critical_ready.set()
+        else:
+            self.event_queue.append(event)
+            self._queue_ready.set()
     
     def subscribe(
         self, 
@@ -302,10 +394,7 @@ class EventBus:
     ) -> str:
         """イベントタイプにハンドラーを登録"""
         self.handlers[event_type].append(handler)
-        self.handler_refs[handler.handler_id] = weakref.ref(handler)
-        self.stats["handlers_registered"] += 1
-        self._update_active_handlers_count()
-        return handler.handler_id
+        return self._register_handler(event_type, handler)
     
     def subscribe_function(
         self, 
@@ -323,154 +412,272 @@ class EventBus:
     def subscribe_global(self, handler: EventHandler) -> str:
         """全イベントタイプにハンドラーを登録"""
         self.global_handlers.append(handler)
-        self.handler_refs[handler.handler_id] = weakref.ref(handler)
+        return self._register_handler(None, handler)
+    
+    def _register_handler(
+        self, 
+        event_type: Optional[EventType], 
+        handler: EventHandler
+    ) -> str:
+        """登録したハンドラーを索引と統計情報に反映"""
+        self._handler_index[handler.handler_id].append((event_type, handler))
+        handler._state_listeners.add(self._on_handler_state_change)
+        if handler.is_active:
+            self._active_handler_count += 1
+        self._invalidate_dispatch_cache()
         self.stats["handlers_registered"] += 1
         self._update_active_handlers_count()
         return handler.handler_id
     
     def unsubscribe(self, handler_id: str) -> bool:
         """ハンドラーの登録を解除"""
-        removed = False
-        
-        # 特定イベントタイプのハンドラーから削除
-        for event_type, handler_list in self.handlers.items():
-            self.handlers[event_type] = [
-                h for h in handler_list if h.handler_id != handler_id
-            ]
-            if len(handler_list) != len(self.handlers[event_type]):
-                removed = True
-        
-        # グローバルハンドラーから削除
-        original_count = len(self.global_handlers)
-        self.global_handlers = [
-            h for h in self.global_handlers if h.handler_id != handler_id
-        ]
-        if len(self.global_handlers) != original_count:
-            removed = True
+        registrations = self._handler_index.pop(handler_id, None)
+        if not registrations:
+            return False
         
-        # 参照を削除
-        if handler_id in self.handler_refs:
-            del self.handler_refs[handler_id]
+        # 登録先のリストからだけ削除(グローバルは None)
+        for event_type, handler in registrations:
+            if event_type is None:
+                self.global_handlers.remove(handler)
+            else:
+                self.handlers[event_type].remove(handler)
+            handler._state_listeners.discard(self._on_handler_state_change)
+            if handler.is_active:
+                self._active_handler_count -= 1
         
-        if removed:
-            self.stats["handlers_registered"] -= 1
-            self._update_active_handlers_count()
+        self._invalidate_dispatch_cache()
+        self.stats["handlers_registered"] -= 1
+        self._update_active_handlers_count()
         
-        return removed
+        return True
+    
+    def _on_handler_state_change(self, handler: EventHandler):
+        """ハンドラーの有効/無効が切り替わった時の処理"""
+        # defaultdict への添字アクセスは空のエントリを作るため get で参照する
+        registrations = sum(
+            1
+            for _, registered in self._handler_index.get(
+                handler.handler_id, ()
+            )
+            if registered is handler
+        )
+        if handler.is_active:
+            self._active_handler_count += registrations
+        else:
+            self._active_handler_count -= registrations
+        self._invalidate_dispatch_cache()
     
     def add_filter(self, filter_func: Callable[[Event], bool]):
         """イベントフィルターを追加"""
         self.event_filters.append(filter_func)
+        self._rebuild_filter_chain()
     
     def remove_filter(self, filter_func: Callable[[Event], bool]):
         """イベントフィルターを削除"""
         if filter_func in self.event_filters:
             self.event_filters.remove(filter_func)
+            self._rebuild_filter_chain()
+    
+    def _rebuild_filter_chain(self):
+        """フィルター一覧から発行時に呼び出す判定関数を組み立てる"""
+        filters = tuple(self.event_filters)
+        if not filters:
+            self._filter_chain = None
+        elif len(filters) == 1:
+            self._filter_chain = filters[0]
+        else:
+            def filter_chain(event: Event) -> bool:
+                for filter_func in filters:
+                    if not filter_func(event):
+                        return False
+                return True
+            
+            self._filter_chain = filter_chain
     
     async def _process_events(self):
-        """イベント処理ループ"""
+        """通常イベントの処理ループ(ワーカーごとに実行)"""
         while self.is_running:
             try:
-                # イベントを取得（タイムアウト付き）
-                event = await asyncio.wait_for(
-                    self.event_queue.get(), timeout=1.0
-                )
+                # イベントが届くまで待機し、その時点でキューに溜まっている
+                # イベントをまとめて取り出す
+                await self._queue_ready.wait()
+                batch = self._take_batch(self.event_queue, self._queue_ready)
                 
-                # イベントを処理
-                await self._handle_event(event)
+                # イベントを処理(完了するまで次のバッチは取り出さない)
+                if batch:
+                    await self._handle_event_batch(batch)
                 
-            except asyncio.TimeoutError:
-                # タイムアウトは正常（継続）
-                continue
             except Exception:
                 # エラーが発生した場合も継続
                 continue
     
+    async def _process_critical_events(self):
+        """クリティカルイベントの処理ループ"""
+        while self.is_running:
+            try:
+                await self._critical_ready.wait()
+                batch = self._take_batch(
+                    self.critical_queue, self._critical_ready
+                )
+                
+                # クリティカルイベントは1件ずつ順番に処理
+                for event in batch:
+                    await self._handle_event(event)
+                
+            except Exception:
+                continue
+    
+    def _take_batch(self, queue: deque, ready: asyncio.Event) -> List[Event]:
+        """キューから最大 _EVENT_BATCH_SIZE 件のイベントを取り出す"""
+        batch = [
+            queue.popleft() for _ in range(min(len(queue), _EVENT_BATCH_SIZE))
+        ]
+        if not queue:
+            ready.clear()
+        return batch
+    
+    async def _handle_event_batch(self, batch: List[Event]):
+        """まとめて取り出したイベントの処理"""
+        pending = []
+        now_ns = time.monotonic_ns()
+        # 統計情報はローカル変数で数え、バッチの最後にまとめて反映する
+        processed = failed = dropped = 0
+        
+        for event in batch:
+            try:
+                # キューで待っている間に期限切れになったイベントは破棄
+                deadline_ns = event._deadline_ns
+                if deadline_ns is not None and deadline_ns < now_ns:
+                    dropped += 1
+                    continue
+                
+                pending.extend(
+                    handler.handle(event)
+                    for handler in self._get_dispatch_handlers(event.type)
+                )
+                self._notify_waiters(event)
+                processed += 1
+                
+            except Exception:
+                failed += 1
+                self._schedule_retry(event)
+        
+        stats = self.stats
+        stats["events_processed"] += processed
+        stats["events_failed"] += failed
+        stats["events_dropped"] += dropped
+        
+        if pending:
+            # バッチ全体のハンドラーをまとめて実行
+            await asyncio.gather(*pending, return_exceptions=True)
+    
     async def _handle_event(self, event: Event):
         """単一イベントの処理"""
         try:
-            handlers_to_run = []
+            deadline_ns = event._deadline_ns
+            if deadline_ns is not None and deadline_ns < time.monotonic_ns():
+                self.stats["events_dropped"] += 1
+                return
             
-            # 特定イベントタイプのハンドラーを取得
-            if event.type in self.handlers:
-                handlers_to_run.extend(self.handlers[event.type])
-            
-            # グローバルハンドラーを追加
-            handlers_to_run.extend(self.global_handlers)
-            
-            # 優先度順にソート
-            if event.priority == EventPriority.CRITICAL:
-                # クリティカルイベントは即座に処理
-                await self._run_handlers(event, handlers_to_run)
-            else:
-                # 通常イベントは非同期で処理
-                asyncio.create_task(
-                    self._run_handlers(event, handlers_to_run)
-                )
+            handlers_to_run = self._get_dispatch_handlers(event.type)
+            await self._run_handlers(event, handlers_to_run)
+            self._notify_waiters(event)
             
             self.stats["events_processed"] += 1
             
         except Exception:
             self.stats["events_failed"] += 1
-            
-            # リトライが必要な場合
-            if event.retry_count < event.max_retries:
-                event.retry_count += 1
-                await self.retry_queue.put(event)
-    
-    async def _run_handlers(self, event: Event, handlers: List[EventHandler]):
-        """ハンドラーを実行"""
-        tasks = []
-        
-        for handler in handlers:
-            if handler.is_active:
-                task = asyncio.create_task(handler.handle(event))
-                tasks.append(task)
+            self._schedule_retry(event)
+    
+    def _notify_waiters(self, event: Event):
+        """イベントを待機している wait_for_event と emit_and_wait に結果を渡す"""
+        correlation_id = event.correlation_id
+        if correlation_id is not None and self._correlation_waiters:
+            waiter = self._correlation_waiters.get(correlation_id)
+            # 発行したイベント自身も同じ相関IDを持つため応答のタイプで区別する
+            if waiter is not None and waiter[0] is event.type:
+                del self._correlation_waiters[correlation_id]
+                if not waiter[1].done():
+                    waiter[1].set_result(event)
+        
+        waiters = self._waiters.get(event.type)
+        if not waiters:
+            return
         
-        if tasks:
-            # 全ハンドラーの完了を待機
-            await asyncio.gather(*tasks, return_exceptions=True)
-    
-    async def _process_retries(self):
-        """リトライ処理ループ"""
-        while self.is_running:
-            try:
-                # リトライイベントを取得
-                event = await asyncio.wait_for(
-                    self.retry_queue.get(), timeout=5.0
-                )
-                
-                # 少し待ってからリトライ
-                await asyncio.sleep(1.0 * event.retry_count)
-                
-                # 再度処理
-                await self._handle_event(event)
-                
-            except asyncio.TimeoutError:
+        for future, filter_func in waiters:
+            if future.done():
                 continue
+            try:
+                if filter_func is None or filter_func(event):
+                    future.set_result(event)
             except Exception:
+                # 条件の評価に失敗した場合は一致しなかったものとして扱う
                 continue
     
+    def _schedule_retry(self, event: Event):
+        """リトライが必要な場合は待機後にキューへ戻すタイマーを設定"""
+        if event.retry_count < event.max_retries:
+            # 指数バックオフ(上限あり)で待機する
+            delay = min(_MAX_RETRY_DELAY, 2 ** event.retry_count)
+            event.retry_count += 1
+            self._retry_handles[id(event)] = (
+                asyncio.get_running_loop().call_later(
+                    delay, self._enqueue_retry, event
+                )
+            )
+    
+    def _enqueue_retry(self, event: Event):
+        """リトライ対象のイベントを処理キューに戻す"""
+        self._retry_handles.pop(id(event), None)
+        if self.is_running:
+            self._enqueue(event)
+    
+    def _get_dispatch_handlers(
+        self, 
+        event_type: EventType
+    ) -> Tuple[EventHandler, ...]:
+        """イベントタイプに対して実行する有効なハンドラーを取得"""
+        handlers = self._dispatch_cache.get(event_type)
+        if handlers is None:
+            handlers = tuple(
+                handler
+                for handler in (
+                    *self.handlers.get(event_type, ()),
+                    *self.global_handlers
+                )
+                if handler.is_active
+            )
+            self._dispatch_cache[event_type] = handlers
+        return handlers
+    
+    def _invalidate_dispatch_cache(self):
+        """ハンドラー一覧のキャッシュを破棄"""
+        self._dispatch_cache.clear()
+    
+    async def _run_handlers(
+        self, 
+        event: Event, 
+        handlers: Tuple[EventHandler, ...]
+    ):
+        """ハンドラーを実行"""
+        # 無効なハンドラーは handle 内で処理せずに終わるため事前確認は不要
+        coros = [handler.handle(event) for handler in handlers]
+        
+        if len(coros) == 1:
+            # ハンドラーが1つなら gather を介さずに直接待機
+            await coros[0]
+        elif coros:
+            # 全ハンドラーの完了を待機
+            await asyncio.gather(*coros, return_exceptions=True)
+    
     def _add_to_history(self, event: Event):
         """イベント履歴に追加"""
         self.event_history.append(event)
-        
-        # 履歴サイズを制限
-        if len(self.event_history) > self.max_history_size:
-            self.event_history = self.event_history[-self.max_history_size:]
     
     def _update_active_handlers_count(self):
         """アクティブハンドラー数を更新"""
-        active_count = 0
-        
-        # 特定イベントタイプのハンドラー
-        for handler_list in self.handlers.values():
-            active_count += sum(1 for h in handler_list if h.is_active)
-        
-        # グローバルハンドラー
-        active_count += sum(1 for h in self.global_handlers if h.is_active)
-        
-        self.stats["handlers_active"] = active_count
+        # 登録・解除と有効/無効の切り替え時に増減させている値を反映する
+        self.stats["handlers_active"] = self._active_handler_count
     
     def get_stats(self) -> Dict[str, Any]:
         """統計情報を取得"""
@@ -479,8 +686,8 @@ class EventBus:
         return {
             **self.stats,
             "is_running": self.is_running,
-            "queue_size": self.event_queue.qsize(),
-            "retry_queue_size": self.retry_queue.qsize(),
+            "queue_size": len(self.event_queue) + len(self.critical_queue),
+            "retry_queue_size": len(self._retry_handles),
             "history_size": len(self.event_history),
             "event_types_subscribed": len(self.handlers),
             "global_handlers": len(self.global_handlers)
@@ -492,10 +699,13 @@ class EventBus:
         event_type: Optional[EventType] = None
     ) -> List[Event]:
         """最近のイベントを取得"""
-        events = self.event_history[-limit:]
+        history = self.event_history
+        events = list(
+            itertools.islice(history, max(0, len(history) - limit), None)
+        )
         
         if event_type:
-            events = [e for e in events if e.type == event_type]
+            events = [e for e in events if e.type is event_type]
         
         return events
     
@@ -527,28 +737,22 @@ class EventBus:
         filter_func: Optional[Callable[[Event], bool]] = None
     ) -> Optional[Event]:
         """特定のイベントを待機"""
-        event_received = asyncio.Event()
-        received_event = None
-        
-        def handler(event: Event) -> bool:
-            nonlocal received_event
-            if not filter_func or filter_func(event):
-                received_event = event
-                event_received.set()
-            return True
-        
-        # 一時的なハンドラーを登録
-        handler_id = self.subscribe_function(event_type, handler)
+        # ハンドラーとして登録せず、処理時に Future へ直接結果を渡す
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, filter_func)
+        self._waiters.setdefault(event_type, []).append(waiter)
         
         try:
             # イベントを待機
-            await asyncio.wait_for(event_received.wait(), timeout=timeout)
-            return received_event
+            return await asyncio.wait_for(future, timeout=timeout)
         except asyncio.TimeoutError:
             return None
         finally:
-            # ハンドラーを削除
-            self.unsubscribe(handler_id)
+            # 待機者を削除
+            waiters = self._waiters[event_type]
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[event_type]
     
     async def emit_and_wait(
         self, 
@@ -560,21 +764,24 @@ class EventBus:
         # 相関IDを設定
         if not event.correlation_id:
             event.correlation_id = str(uuid.uuid4())
+        correlation_id = event.correlation_id
         
-        # 応答フィルター
-        def response_filter(response_event: Event) -> bool:
-            return response_event.correlation_id == event.correlation_id
+        # 発行より前に応答の待機先を登録しておく
+        future = asyncio.get_running_loop().create_future()
+        self._correlation_waiters[correlation_id] = (response_type, future)
         
-        # 応答待機を開始
-        wait_task = asyncio.create_task(
-            self.wait_for_event(response_type, timeout, response_filter)
-        )
-        
-        # イベントを発行
-        await self.publish(event)
-        
-        # 応答を待機
-        return await wait_task
+        try:
+            # イベントを発行
+            await self.publish(event)
+            
+            # 応答を待機
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiter = self._correlation_waiters.get(correlation_id)
+            if waiter is not None and waiter[1] is future:
+                del self._correlation_waiters[correlation_id]
 
 
 # グローバルイベントバスインスタンス
@@ -4,19 +4,93 @@
 同期ルールなどを管理するシステム
 """
 
-import json
+import asyncio
+import base64
+import hashlib
+import heapq
+import logging
+import os
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Set
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from enum import Enum
 import aiofiles
+import orjson
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 from aoi.integration.cross_platform_system import PlatformType, DataType
 
 
+logger = logging.getLogger(__name__)
+
+# 設定ファイルの書き出しオプション(従来の indent=2 と同じ体裁)
+_FILE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# 変更をまとめて書き出すまでの待ち時間(秒)
+_FLUSH_DELAY = 0.2
+# 書き出しに失敗したときの再試行間隔の上限(秒、失敗のたびに倍にする)
+_FLUSH_RETRY_MAX_DELAY = 30.0
+
+# AES-GCM の nonce 長と鍵導出用のコンテキスト
+_NONCE_SIZE = 12
+_AEAD_KEY_INFO = b"aoi-integration-config/aes-gcm"
+
+
+def _json_default(obj: Any) -> Any:
+    """orjson が直接扱えない型を変換(集合は値の順に並べたリストにする)"""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=lambda item: getattr(item, "value", item))
+    raise TypeError
+
+
+def _dump_file(data: Any) -> bytes:
+    """設定ファイルに書き出すバイト列を作成
+    
+    データクラス、Enum、datetime は orjson がそのまま変換する
+    """
+    return orjson.dumps(data, default=_json_default, option=_FILE_OPTIONS)
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """ISO 形式の日時文字列を変換(同じ文字列は再利用)"""
+    return datetime.fromisoformat(value)
+
+
+def _parse_datetimes(data: Dict[str, Any], *keys: str) -> None:
+    """読み込んだ辞書の日時文字列を datetime に置き換え"""
+    for key in keys:
+        value = data.get(key)
+        if isinstance(value, str):
+            data[key] = _parse_iso(value)
+
+
+def _derive_aead_key(encryption_key: bytes) -> bytes:
+    """鍵ファイルの内容から AES-256-GCM 用の鍵を導出
+    
+    鍵ファイルは従来の Fernet 形式のまま使い、旧形式の復号にも利用する
+    """
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=_AEAD_KEY_INFO,
+    ).derive(encryption_key)
+
+
+def _digest(payload: bytes) -> bytes:
+    """書き出し内容の比較用ダイジェスト"""
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
 class SyncFrequency(Enum):
     """同期頻度"""
     REAL_TIME = "real_time"
@@ -58,6 +132,22 @@ class SyncRule:
         if isinstance(self.updated_at, str):
             self.updated_at = datetime.fromisoformat(self.updated_at)
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SyncRule':
+        """保存形式の辞書から作成(Enum・日時も変換)"""
+        data = data.copy()
+        data["data_type"] = DataType(data["data_type"])
+        data["source_platforms"] = [
+            PlatformType(p) for p in data["source_platforms"]
+        ]
+        data["target_platforms"] = [
+            PlatformType(p) for p in data["target_platforms"]
+        ]
+        data["frequency"] = SyncFrequency(data["frequency"])
+        data["security_level"] = SecurityLevel(data["security_level"])
+        _parse_datetimes(data, "created_at", "updated_at")
+        return cls(**data)
+
 
 @dataclass
 class PlatformCredentials:
@@ -78,6 +168,14 @@ class PlatformCredentials:
         if isinstance(self.last_used, str):
             self.last_used = datetime.fromisoformat(self.last_used)
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PlatformCredentials':
+        """保存形式の辞書から作成(credentials は復号済みであること)"""
+        data = data.copy()
+        data["platform_type"] = PlatformType(data["platform_type"])
+        _parse_datetimes(data, "expires_at", "created_at", "last_used")
+        return cls(**data)
+
 
 @dataclass
 class IntegrationSettings:
@@ -108,6 +206,20 @@ class IntegrationSettings:
         if isinstance(self.updated_at, str):
             self.updated_at = datetime.fromisoformat(self.updated_at)
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IntegrationSettings':
+        """保存形式の辞書から作成(Enum・日時も変換)"""
+        data = data.copy()
+        data["allowed_platforms"] = {
+            PlatformType(p)
+            for p in data.get("allowed_platforms", PlatformType)
+        }
+        data["blocked_data_types"] = {
+            DataType(d) for d in data.get("blocked_data_types", ())
+        }
+        _parse_datetimes(data, "created_at", "updated_at")
+        return cls(**data)
+
 
 @dataclass
 class IntegrationConfig:
@@ -142,18 +254,58 @@ class ConfigurationManager:
         # 暗号化キー
         self._encryption_key: Optional[bytes] = None
         self._fernet: Optional[Fernet] = None
+        self._aead: Optional[AESGCM] = None
         
         # キャッシュ
         self._settings_cache: Optional[IntegrationSettings] = None
         self._sync_rules_cache: Dict[str, SyncRule] = {}
+        # データ種別ごとの同期ルール索引(全ルール/有効なルール)
+        self._rules_by_type: Dict[DataType, Dict[str, SyncRule]] = {}
+        self._enabled_rules_by_type: Dict[DataType, Dict[str, SyncRule]] = {}
+        # get_sync_rules の検索結果((data_type, enabled_only) 別)
+        self._rule_query_cache: Dict[tuple, List[SyncRule]] = {}
         self._credentials_cache: Dict[str, PlatformCredentials] = {}
+        # 有効期限順のヒープ((expires_at, key)、古い項目は取り出し時に無視)
+        self._expiry_heap: List[tuple] = []
+        
+        # 未保存のセクションと遅延書き出し
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_depth = 0
+        self._flush_lock = asyncio.Lock()
+        # 最後に書き出した内容のダイジェスト(セクション別)
+        self._last_hash: Dict[str, bytes] = {}
+        
+        # 初回アクセス時に読み込むセクション(同時アクセスはロックで1回に)
+        self._rules_loaded = asyncio.Event()
+        self._credentials_loaded = asyncio.Event()
+        self._load_lock = asyncio.Lock()
 
     async def initialize(self) -> None:
-        """設定管理システムを初期化"""
+        """設定管理システムを初期化
+        
+        同期ルールと認証情報は最初に使われた時点で読み込む
+        """
         await self._load_encryption_key()
         await self._load_settings()
-        await self._load_sync_rules()
-        await self._load_credentials()
+
+    async def _ensure_loaded(self, section: str) -> None:
+        """遅延読み込みのセクションを必要なら読み込む"""
+        loaded, loader = {
+            "sync_rules": (self._rules_loaded, self._load_sync_rules),
+            "credentials": (
+                self._credentials_loaded, self._load_credentials
+            ),
+        }[section]
+        if loaded.is_set():
+            return
+        async with self._load_lock:
+            if not loaded.is_set():
+                # 未初期化のまま認証情報を読むと復号できないため鍵を先に読む
+                if self._aead is None:
+                    await self._load_encryption_key()
+                await loader()
+                loaded.set()
 
     async def _load_encryption_key(self) -> None:
         """暗号化キーを読み込み"""
@@ -170,17 +322,17 @@ class ConfigurationManager:
             self.encryption_key_file.chmod(0o600)
         
         self._fernet = Fernet(self._encryption_key)
+        self._aead = AESGCM(_derive_aead_key(self._encryption_key))
 
     async def _load_settings(self) -> None:
         """統合設定を読み込み"""
         if self.settings_file.exists():
             try:
-                async with aiofiles.open(
-                    self.settings_file, 'r', encoding='utf-8'
-                ) as f:
+                async with aiofiles.open(self.settings_file, 'rb') as f:
                     content = await f.read()
-                    data = json.loads(content)
-                    self._settings_cache = IntegrationSettings(**data)
+                    self._settings_cache = IntegrationSettings.from_dict(
+                        orjson.loads(content)
+                    )
             except Exception:
                 # デフォルト設定を作成
                 self._settings_cache = IntegrationSettings(
@@ -199,68 +351,22 @@ class ConfigurationManager:
         if not self._settings_cache:
             return
         
-        # Set型をリストに変換
-        data = {
-            "user_id": self._settings_cache.user_id,
-            "encryption_enabled": self._settings_cache.encryption_enabled,
-            "auto_sync_enabled": self._settings_cache.auto_sync_enabled,
-            "conflict_resolution": self._settings_cache.conflict_resolution,
-            "max_sync_retries": self._settings_cache.max_sync_retries,
-            "sync_timeout": self._settings_cache.sync_timeout,
-            "sync_interval": self._settings_cache.sync_interval,
-            "data_retention_days": self._settings_cache.data_retention_days,
-            "allowed_platforms": [
-                p.value if hasattr(p, 'value') else p 
-                for p in self._settings_cache.allowed_platforms
-            ],
-            "blocked_data_types": [
-                d.value if hasattr(d, 'value') else d 
-                for d in self._settings_cache.blocked_data_types
-            ],
-            "custom_settings": self._settings_cache.custom_settings,
-            "created_at": self._settings_cache.created_at.isoformat(),
-            "updated_at": self._settings_cache.updated_at.isoformat()
-        }
-        
-        async with aiofiles.open(
-            self.settings_file, 'w', encoding='utf-8'
-        ) as f:
-            await f.write(
-                json.dumps(data, ensure_ascii=False, indent=2)
-            )
+        await self._write_file(
+            "settings", self.settings_file, _dump_file(self._settings_cache)
+        )
 
     async def _load_sync_rules(self) -> None:
         """同期ルールを読み込み"""
         if self.sync_rules_file.exists():
             try:
-                async with aiofiles.open(
-                    self.sync_rules_file, 'r', encoding='utf-8'
-                ) as f:
+                async with aiofiles.open(self.sync_rules_file, 'rb') as f:
                     content = await f.read()
-                    data = json.loads(content)
+                    data = orjson.loads(content)
                     
                     for rule_data in data:
-                        # Enum型に変換
-                        rule_data["data_type"] = DataType(
-                            rule_data["data_type"]
-                        )
-                        rule_data["source_platforms"] = [
-                            PlatformType(p)
-                            for p in rule_data["source_platforms"]
-                        ]
-                        rule_data["target_platforms"] = [
-                            PlatformType(p)
-                            for p in rule_data["target_platforms"]
-                        ]
-                        rule_data["frequency"] = SyncFrequency(
-                            rule_data["frequency"]
-                        )
-                        rule_data["security_level"] = SecurityLevel(
-                            rule_data["security_level"]
-                        )
-                        
-                        rule = SyncRule(**rule_data)
+                        rule = SyncRule.from_dict(rule_data)
                         self._sync_rules_cache[rule.id] = rule
+                    self._rebuild_rule_index()
                         
             except Exception:
                 # デフォルトルールを作成
@@ -307,125 +413,224 @@ class ConfigurationManager:
         
         for rule in default_rules:
             self._sync_rules_cache[rule.id] = rule
+        self._rebuild_rule_index()
         
-        await self._save_sync_rules()
+        # 書き出し中のフラッシュと競合しないよう、遅延書き出しに任せる
+        self._mark_dirty("sync_rules")
 
     async def _save_sync_rules(self) -> None:
         """同期ルールを保存"""
-        data = []
-        for rule in self._sync_rules_cache.values():
-            rule_data = {
-                "id": rule.id,
-                "name": rule.name,
-                "data_type": rule.data_type.value,
-                "source_platforms": [
-                    p.value for p in rule.source_platforms
-                ],
-                "target_platforms": [
-                    p.value for p in rule.target_platforms
-                ],
-                "frequency": rule.frequency.value,
-                "security_level": rule.security_level.value,
-                "filters": rule.filters,
-                "transformations": rule.transformations,
-                "enabled": rule.enabled,
-                "created_at": rule.created_at.isoformat(),
-                "updated_at": rule.updated_at.isoformat()
-            }
-            data.append(rule_data)
-        
-        async with aiofiles.open(
-            self.sync_rules_file, 'w', encoding='utf-8'
-        ) as f:
-            await f.write(
-                json.dumps(data, ensure_ascii=False, indent=2)
-            )
+        data = list(self._sync_rules_cache.values())
+        await self._write_file(
+            "sync_rules", self.sync_rules_file, _dump_file(data)
+        )
 
     async def _load_credentials(self) -> None:
         """認証情報を読み込み"""
         if self.credentials_file.exists():
             try:
-                async with aiofiles.open(
-                    self.credentials_file, 'r', encoding='utf-8'
-                ) as f:
+                async with aiofiles.open(self.credentials_file, 'rb') as f:
                     content = await f.read()
-                    data = json.loads(content)
-                    
-                    for cred_data in data:
-                        # Enum型に変換
-                        cred_data["platform_type"] = PlatformType(
-                            cred_data["platform_type"]
-                        )
-                        
-                        # 認証情報を復号化
-                        if self._fernet and cred_data.get("credentials"):
-                            encrypted_creds = cred_data["credentials"]
-                            decrypted_creds = {}
-                            for key, encrypted_value in encrypted_creds.items():
-                                try:
-                                    decrypted_value = (
-                                        self._fernet.decrypt(
-                                            encrypted_value.encode()
-                                        ).decode()
-                                    )
-                                    decrypted_creds[key] = decrypted_value
-                                except Exception:
-                                    # 復号化に失敗した場合はスキップ
-                                    continue
-                            cred_data["credentials"] = decrypted_creds
-                        
-                        cred = PlatformCredentials(**cred_data)
-                        key = f"{cred.platform_type.value}_{cred.platform_id}"
-                        self._credentials_cache[key] = cred
-                        
+                data = orjson.loads(content)
+                
+                # 復号はイベントループを止めないようスレッドで実行
+                credentials = await asyncio.to_thread(
+                    self._decrypt_all_credentials, data
+                )
+                for cred in credentials:
+                    key = f"{cred.platform_type.value}_{cred.platform_id}"
+                    self._credentials_cache[key] = cred
+                
+                self._expiry_heap = [
+                    (cred.expires_at, key)
+                    for key, cred in self._credentials_cache.items()
+                    if cred.expires_at
+                ]
+                heapq.heapify(self._expiry_heap)
+            
             except Exception:
                 # 認証情報の読み込みに失敗した場合は空のキャッシュを使用
                 self._credentials_cache = {}
+                self._expiry_heap = []
+
+    def _decrypt_all_credentials(
+        self, records: List[Dict[str, Any]]
+    ) -> List[PlatformCredentials]:
+        """保存形式のレコードを復号化して認証情報に変換(ワーカースレッドで実行)"""
+        credentials = []
+        for cred_data in records:
+            cred_data["credentials"] = self._decrypt_credentials(cred_data)
+            credentials.append(PlatformCredentials.from_dict(cred_data))
+        return credentials
+
+    def _decrypt_credentials(
+        self, cred_data: Dict[str, Any]
+    ) -> Dict[str, str]:
+        """保存形式から認証情報を復号化"""
+        blob = cred_data.pop("credentials_blob", None)
+        encrypted_creds = cred_data.get("credentials") or {}
+        if not self._aead:
+            return encrypted_creds
+        
+        if blob is not None:
+            try:
+                return orjson.loads(self._open_blob(
+                    blob, cred_data["platform_id"].encode()
+                ))
+            except Exception:
+                # 復号化に失敗した場合は空にする
+                return {}
+        
+        # 旧形式(値ごとに暗号化)
+        decrypted_creds = {}
+        for key, encrypted_value in encrypted_creds.items():
+            try:
+                decrypted_creds[key] = self._fernet.decrypt(
+                    encrypted_value.encode()
+                ).decode()
+            except Exception:
+                # 復号化に失敗した場合はスキップ
+                continue
+        return decrypted_creds
 
     async def _save_credentials(self) -> None:
         """認証情報を保存"""
+        # 暗号文は毎回変わるため、暗号化前の内容で変更の有無を判定する
+        digest = _digest(_dump_file(list(self._credentials_cache.values())))
+        if self._last_hash.get("credentials") == digest:
+            return
+        
+        # 暗号化はイベントループを止めないようスレッドで実行
+        data = await asyncio.to_thread(
+            self._encrypt_all_credentials,
+            list(self._credentials_cache.values())
+        )
+        await self._write_file(
+            "credentials", self.credentials_file, _dump_file(data), digest
+        )
+
+    def _encrypt_all_credentials(
+        self, credentials: List[PlatformCredentials]
+    ) -> List[Dict[str, Any]]:
+        """認証情報を暗号化して保存形式に変換(ワーカースレッドで実行)"""
         data = []
-        for cred in self._credentials_cache.values():
-            # 認証情報を暗号化
-            encrypted_creds = {}
-            if self._fernet and cred.credentials:
-                for key, value in cred.credentials.items():
-                    try:
-                        encrypted_value = (
-                            self._fernet.encrypt(value.encode()).decode()
-                        )
-                        encrypted_creds[key] = encrypted_value
-                    except Exception:
-                        # 暗号化に失敗した場合はスキップ
-                        continue
-            
-            cred_data = {
-                "platform_type": cred.platform_type.value,
-                "platform_id": cred.platform_id,
-                "auth_type": cred.auth_type,
-                "credentials": encrypted_creds,
-                "expires_at": (
-                    cred.expires_at.isoformat() if cred.expires_at else None
-                ),
-                "created_at": cred.created_at.isoformat(),
-                "last_used": (
-                    cred.last_used.isoformat() if cred.last_used else None
-                )
-            }
-            data.append(cred_data)
+        for cred in credentials:
+            record = dict(vars(cred))
+            record["credentials"] = {}
+            # 認証情報を1つのブロックとしてまとめて暗号化
+            if self._aead and cred.credentials:
+                record["credentials_blob"] = base64.b64encode(
+                    self.encrypt_bytes(
+                        orjson.dumps(cred.credentials),
+                        cred.platform_id.encode()
+                    )
+                ).decode()
+            data.append(record)
+        return data
+
+    async def _write_file(
+        self,
+        section: str,
+        path: Path,
+        payload: bytes,
+        digest: Optional[bytes] = None
+    ) -> None:
+        """設定ファイルを書き出す(内容が前回と同じなら書き込まない)"""
+        digest = digest or _digest(payload)
+        if self._last_hash.get(section) == digest:
+            return
         
-        async with aiofiles.open(
-            self.credentials_file, 'w', encoding='utf-8'
-        ) as f:
-            await f.write(
-                json.dumps(data, ensure_ascii=False, indent=2)
-            )
+        # 一時ファイルに書いてから置き換え、書き込み途中での破損を防ぐ
+        tmp_file = path.with_suffix('.json.tmp')
+        async with aiofiles.open(tmp_file, 'wb') as f:
+            await f.write(payload)
+            await f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+        self._last_hash[section] = digest
+
+    # 遅延書き出し
+    
+    def _mark_dirty(self, section: str) -> None:
+        """セクションを未保存としてマークし、遅延書き出しを予約
+        
+        書き出しの完了や失敗を知る必要がある呼び出し元は flush() を待つ
+        """
+        self._dirty.add(section)
+        if self._batch_depth:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._debounced_flush())
+    
+    async def _debounced_flush(self) -> None:
+        """短時間に続いた変更をまとめて書き出す(失敗したら間隔をあけて再試行)"""
+        delay = _FLUSH_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.flush()
+                return
+            except Exception:
+                logger.exception("設定ファイルの書き出しに失敗しました")
+            delay = min(delay * 2, _FLUSH_RETRY_MAX_DELAY)
+    
+    @asynccontextmanager
+    async def _batch(self):
+        """ブロック内の変更を終了時に一度だけ書き出す"""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                await self.flush()
+    
+    async def flush(self) -> None:
+        """未保存のセクションをすべて書き出す
+        
+        書き出し中に変更されたセクションも、未保存がなくなるまで続けて
+        書き出す。保存に失敗したセクションは未保存のまま残す
+        """
+        savers = {
+            "settings": self._save_settings,
+            "sync_rules": self._save_sync_rules,
+            "credentials": self._save_credentials,
+        }
+        async with self._flush_lock:
+            while self._dirty:
+                for name in [name for name in savers if name in self._dirty]:
+                    # 保存中の変更で再びマークされるよう、保存前に外す
+                    self._dirty.discard(name)
+                    saved = False
+                    try:
+                        await savers[name]()
+                        saved = True
+                    finally:
+                        if not saved:
+                            self._dirty.add(name)
+    
+    async def close(self) -> None:
+        """遅延書き出しを停止し、未保存の変更を書き出す"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except (asyncio.CancelledError, Exception):
+                # 失敗したセクションは未保存のまま残り、下で書き出し直す
+                pass
+            self._flush_task = None
+        await self.flush()
 
     # 公開メソッド
     
+    @property
+    def settings(self) -> IntegrationSettings:
+        """統合設定(initialize 済みであること)"""
+        return self._settings_cache
+    
     async def get_settings(self) -> IntegrationSettings:
-        """統合設定を取得"""
-        if not self._settings_cache:
+        """統合設定を取得(未初期化の場合のみ読み込む)"""
+        if self._settings_cache is None:
             await self._load_settings()
         return self._settings_cache
     
@@ -436,7 +641,7 @@ class ConfigurationManager:
     async def save_config(self, config: IntegrationSettings) -> None:
         """設定を保存"""
         self._settings_cache = config
-        await self._save_settings()
+        self._mark_dirty("settings")
 
     async def update_settings(self, **kwargs) -> None:
         """統合設定を更新"""
@@ -448,7 +653,7 @@ class ConfigurationManager:
                 setattr(self._settings_cache, key, value)
         
         self._settings_cache.updated_at = datetime.now()
-        await self._save_settings()
+        self._mark_dirty("settings")
 
     async def get_sync_rules(
         self, 
@@ -456,40 +661,97 @@ class ConfigurationManager:
         enabled_only: bool = True
     ) -> List[SyncRule]:
         """同期ルールを取得"""
-        rules = list(self._sync_rules_cache.values())
-        
-        if data_type:
-            rules = [r for r in rules if r.data_type == data_type]
-        
-        if enabled_only:
-            rules = [r for r in rules if r.enabled]
+        await self._ensure_loaded("sync_rules")
+        key = (data_type, enabled_only)
+        rules = self._rule_query_cache.get(key)
+        if rules is None:
+            if data_type:
+                index = (
+                    self._enabled_rules_by_type if enabled_only
+                    else self._rules_by_type
+                )
+                rules = list(index.get(data_type, {}).values())
+            else:
+                rules = list(self._sync_rules_cache.values())
+                if enabled_only:
+                    rules = [r for r in rules if r.enabled]
+            
+            self._rule_query_cache[key] = rules
         
-        return rules
+        # キャッシュを呼び出し側の変更から守るため複製を返す
+        return list(rules)
+
+    def _rules_changed(self) -> None:
+        """同期ルールの変更後に検索結果のキャッシュを破棄"""
+        self._rule_query_cache.clear()
+
+    def _index_rule(self, rule: SyncRule) -> None:
+        """同期ルールを索引に登録"""
+        self._rules_by_type.setdefault(rule.data_type, {})[rule.id] = rule
+        if rule.enabled:
+            self._enabled_rules_by_type.setdefault(
+                rule.data_type, {}
+            )[rule.id] = rule
+
+    def _unindex_rule(self, rule_id: str, data_type: DataType) -> None:
+        """同期ルールを索引から削除"""
+        self._rules_by_type.get(data_type, {}).pop(rule_id, None)
+        self._enabled_rules_by_type.get(data_type, {}).pop(rule_id, None)
+
+    def _reindex(
+        self, rule: SyncRule, old_type: DataType, old_enabled: bool
+    ) -> None:
+        """データ種別か有効状態が変わったルールを登録し直す"""
+        if rule.data_type == old_type and rule.enabled == old_enabled:
+            return
+        self._unindex_rule(rule.id, old_type)
+        self._index_rule(rule)
+
+    def _rebuild_rule_index(self) -> None:
+        """同期ルールの索引を作り直す"""
+        self._rules_by_type.clear()
+        self._enabled_rules_by_type.clear()
+        for rule in self._sync_rules_cache.values():
+            self._index_rule(rule)
+        self._rules_changed()
 
     async def add_sync_rule(self, rule: SyncRule) -> None:
         """同期ルールを追加"""
+        await self._ensure_loaded("sync_rules")
+        old_rule = self._sync_rules_cache.get(rule.id)
+        if old_rule:
+            self._unindex_rule(old_rule.id, old_rule.data_type)
         self._sync_rules_cache[rule.id] = rule
-        await self._save_sync_rules()
+        self._index_rule(rule)
+        self._rules_changed()
+        self._mark_dirty("sync_rules")
 
     async def update_sync_rule(self, rule_id: str, **kwargs) -> bool:
         """同期ルールを更新"""
+        await self._ensure_loaded("sync_rules")
         if rule_id not in self._sync_rules_cache:
             return False
         
         rule = self._sync_rules_cache[rule_id]
+        old_type, old_enabled = rule.data_type, rule.enabled
         for key, value in kwargs.items():
             if hasattr(rule, key):
                 setattr(rule, key, value)
         
         rule.updated_at = datetime.now()
-        await self._save_sync_rules()
+        self._reindex(rule, old_type, old_enabled)
+        self._rules_changed()
+        self._mark_dirty("sync_rules")
         return True
 
     async def remove_sync_rule(self, rule_id: str) -> bool:
         """同期ルールを削除"""
+        await self._ensure_loaded("sync_rules")
         if rule_id in self._sync_rules_cache:
-            del self._sync_rules_cache[rule_id]
-            await self._save_sync_rules()
+            rule = self._sync_rules_cache.pop(rule_id)
+            self._unindex_rule(rule_id, rule.data_type)
+            self._rules_changed()
+            self._mark_dirty("sync_rules")
             return True
         return False
 
@@ -499,14 +761,20 @@ class ConfigurationManager:
         platform_id: str
     ) -> Optional[PlatformCredentials]:
         """認証情報を取得"""
+        await self._ensure_loaded("credentials")
         key = f"{platform_type.value}_{platform_id}"
         return self._credentials_cache.get(key)
 
     async def store_credentials(self, credentials: PlatformCredentials) -> None:
         """認証情報を保存"""
+        await self._ensure_loaded("credentials")
         key = f"{credentials.platform_type.value}_{credentials.platform_id}"
         self._credentials_cache[key] = credentials
-        await self._save_credentials()
+        if credentials.expires_at:
+            heapq.heappush(
+                self._expiry_heap, (credentials.expires_at, key)
+            )
+        self._mark_dirty("credentials")
 
     async def remove_credentials(
         self, 
@@ -514,27 +782,32 @@ class ConfigurationManager:
         platform_id: str
     ) -> bool:
         """認証情報を削除"""
+        await self._ensure_loaded("credentials")
         key = f"{platform_type.value}_{platform_id}"
         if key in self._credentials_cache:
             del self._credentials_cache[key]
-            await self._save_credentials()
+            self._mark_dirty("credentials")
             return True
         return False
 
     async def cleanup_expired_credentials(self) -> int:
         """期限切れの認証情報をクリーンアップ"""
+        await self._ensure_loaded("credentials")
         now = datetime.now()
         expired_keys = []
         
-        for key, cred in self._credentials_cache.items():
-            if cred.expires_at and cred.expires_at < now:
+        # 期限の早い順に取り出し、未来の期限に達したら打ち切る
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            cred = self._credentials_cache.get(key)
+            # 削除・再登録で古くなった項目は無視
+            if cred and cred.expires_at == expires_at:
+                del self._credentials_cache[key]
                 expired_keys.append(key)
         
-        for key in expired_keys:
-            del self._credentials_cache[key]
-        
         if expired_keys:
-            await self._save_credentials()
+            self._mark_dirty("credentials")
         
         return len(expired_keys)
 
@@ -557,132 +830,100 @@ class ConfigurationManager:
         platform_key = f"platform_{platform_type.value}"
         settings.custom_settings[platform_key] = config
         settings.updated_at = datetime.now()
-        await self._save_settings()
+        self._mark_dirty("settings")
+
+    def encrypt_bytes(
+        self, data: bytes, associated_data: bytes = b""
+    ) -> bytes:
+        """データを AES-GCM で暗号化(先頭12バイトは nonce)"""
+        if not self._aead:
+            raise ValueError("暗号化キーが初期化されていません")
+        nonce = os.urandom(_NONCE_SIZE)
+        return nonce + self._aead.encrypt(nonce, data, associated_data)
+
+    def decrypt_bytes(
+        self, encrypted_data: bytes, associated_data: bytes = b""
+    ) -> bytes:
+        """encrypt_bytes で暗号化したデータを復号化"""
+        if not self._aead:
+            raise ValueError("暗号化キーが初期化されていません")
+        return self._aead.decrypt(
+            encrypted_data[:_NONCE_SIZE],
+            encrypted_data[_NONCE_SIZE:],
+            associated_data
+        )
+
+    def _open_blob(self, blob: str, associated_data: bytes = b"") -> bytes:
+        """Base64 文字列の暗号文を復号化(旧形式の Fernet トークンにも対応)"""
+        try:
+            return self.decrypt_bytes(
+                base64.b64decode(blob), associated_data
+            )
+        except (InvalidTag, ValueError):
+            return self._fernet.decrypt(blob.encode())
 
     def encrypt_data(self, data: str) -> str:
         """データを暗号化"""
-        if not self._fernet:
-            raise ValueError("暗号化キーが初期化されていません")
-        return self._fernet.encrypt(data.encode()).decode()
+        return base64.b64encode(self.encrypt_bytes(data.encode())).decode()
 
     def decrypt_data(self, encrypted_data: str) -> str:
         """データを復号化"""
-        if not self._fernet:
+        if not self._aead:
             raise ValueError("暗号化キーが初期化されていません")
-        return self._fernet.decrypt(encrypted_data.encode()).decode()
+        return self._open_blob(encrypted_data).decode()
 
     async def export_config(
         self, include_credentials: bool = False
     ) -> Dict[str, Any]:
         """設定をエクスポート"""
-        settings = await self.get_settings()
-        sync_rules = await self.get_sync_rules(enabled_only=False)
-        
-        export_data = {
-            "settings": {
-                "user_id": settings.user_id,
-                "encryption_enabled": settings.encryption_enabled,
-                "auto_sync_enabled": settings.auto_sync_enabled,
-                "conflict_resolution": settings.conflict_resolution,
-                "max_sync_retries": settings.max_sync_retries,
-                "sync_timeout": settings.sync_timeout,
-                "data_retention_days": settings.data_retention_days,
-                "allowed_platforms": [
-                    p.value for p in settings.allowed_platforms
-                ],
-                "blocked_data_types": [
-                    d.value for d in settings.blocked_data_types
-                ],
-                "custom_settings": settings.custom_settings,
-                "created_at": settings.created_at.isoformat(),
-                "updated_at": settings.updated_at.isoformat()
-            },
-            "sync_rules": [
-                {
-                    "id": rule.id,
-                    "name": rule.name,
-                    "data_type": rule.data_type.value,
-                    "source_platforms": [
-                        p.value for p in rule.source_platforms
-                    ],
-                    "target_platforms": [
-                        p.value for p in rule.target_platforms
-                    ],
-                    "frequency": rule.frequency.value,
-                    "security_level": rule.security_level.value,
-                    "filters": rule.filters,
-                    "transformations": rule.transformations,
-                    "enabled": rule.enabled,
-                    "created_at": rule.created_at.isoformat(),
-                    "updated_at": rule.updated_at.isoformat()
-                }
-                for rule in sync_rules
-            ]
+        export_data: Dict[str, Any] = {
+            "settings": await self.get_settings(),
+            "sync_rules": await self.get_sync_rules(enabled_only=False),
         }
         
         if include_credentials:
+            await self._ensure_loaded("credentials")
+            # 認証情報自体は含めない（セキュリティ上の理由）
             export_data["credentials"] = [
-                {
-                    "platform_type": cred.platform_type.value,
-                    "platform_id": cred.platform_id,
-                    "auth_type": cred.auth_type,
-                    "expires_at": (
-                        cred.expires_at.isoformat() 
-                        if cred.expires_at else None
-                    ),
-                    "created_at": cred.created_at.isoformat(),
-                    "last_used": (
-                        cred.last_used.isoformat() 
-                        if cred.last_used else None
-                    )
-                    # 認証情報自体は含めない（セキュリティ上の理由）
-                }
+                replace(cred, credentials={})
                 for cred in self._credentials_cache.values()
             ]
         
-        return export_data
+        # データクラス・Enum・datetime は orjson が JSON 互換の値に変換する
+        return orjson.loads(orjson.dumps(
+            export_data,
+            default=_json_default,
+            option=orjson.OPT_NON_STR_KEYS
+        ))
 
     async def import_config(self, config_data: Dict[str, Any]) -> bool:
         """設定をインポート"""
         try:
-            # 設定をインポート
-            if "settings" in config_data:
-                settings_data = config_data["settings"]
-                # Enum型に変換
-                if "allowed_platforms" in settings_data:
-                    settings_data["allowed_platforms"] = [
-                        PlatformType(p) for p in settings_data["allowed_platforms"]
-                    ]
-                if "blocked_data_types" in settings_data:
-                    settings_data["blocked_data_types"] = [
-                        DataType(d) for d in settings_data["blocked_data_types"]
-                    ]
+            async with self._batch():
+                # 設定をインポート
+                if "settings" in config_data:
+                    self._settings_cache = IntegrationSettings.from_dict(
+                        config_data["settings"]
+                    )
+                    self._mark_dirty("settings")
                 
-                self._settings_cache = IntegrationSettings(**settings_data)
-                await self._save_settings()
-            
-            # 同期ルールをインポート
-            if "sync_rules" in config_data:
-                self._sync_rules_cache = {}
-                for rule_data in config_data["sync_rules"]:
-                    # Enum型に変換
-                    rule_data["data_type"] = DataType(rule_data["data_type"])
-                    rule_data["source_platforms"] = [
-                        PlatformType(p) for p in rule_data["source_platforms"]
+                # 同期ルールをインポート
+                if "sync_rules" in config_data:
+                    rules = [
+                        SyncRule.from_dict(rule_data)
+                        for rule_data in config_data["sync_rules"]
                     ]
-                    rule_data["target_platforms"] = [
-                        PlatformType(p) 
-                        for p in rule_data["target_platforms"]
-                    ]
-                    rule_data["frequency"] = SyncFrequency(rule_data["frequency"])
-                    rule_data["security_level"] = SecurityLevel(
-                        rule_data["security_level"]
-                    )
+                    # 実行中の遅延読み込みがファイルのルールを混ぜないよう、
+                    # 読み込みの完了を待ってから置き換える
+                    async with self._load_lock:
+                        self._sync_rules_cache = {
+                            rule.id: rule for rule in rules
+                        }
+                        self._rebuild_rule_index()
+                        # 置き換えたので、ファイルからの遅延読み込みは不要
+                        self._rules_loaded.set()
                     
-                    rule = SyncRule(**rule_data)
-                    self._sync_rules_cache[rule.id] = rule
-                
-                await self._save_sync_rules()
+                    self._mark_dirty("sync_rules")
             
             return True
             
@@ -693,8 +934,9 @@ class ConfigurationManager:
         """統合設定を読み込んでIntegrationConfigオブジェクトを返す"""
         await self.initialize()
         
-        settings = await self.get_settings()
+        settings = self.settings
         sync_rules = await self.get_sync_rules(enabled_only=False)
+        await self._ensure_loaded("credentials")
         credentials = list(self._credentials_cache.values())
         
         return IntegrationConfig(
@@ -707,6 +949,7 @@ class ConfigurationManager:
         """設定管理システムのステータスを取得"""
         settings = await self.get_settings()
         sync_rules = await self.get_sync_rules(enabled_only=False)
+        await self._ensure_loaded("credentials")
         
         return {
             "user_id": settings.user_id,
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""クロスプラットフォーム同期(送信待ち・リトライ)のテスト"""
+
+import asyncio
+import os
+import tempfile
+
+from aiohttp import web
+
+from aoi.integration.cross_platform_system import (
+    CrossPlatformSystem,
+    DataType,
+    PlatformType,
+    SyncOperation,
+    SyncStatus,
+)
+
+
+def _new_system() -> CrossPlatformSystem:
+    """一時ディレクトリに設定を置くシステムを作成"""
+    return CrossPlatformSystem(
+        os.path.join(tempfile.mkdtemp(), "cross_platform.json")
+    )
+
+
+async def _stop_outbox_during_post() -> None:
+    system = _new_system()
+    platform_id = await system.register_platform(
+        PlatformType.MOBILE_APP, "1.0", ["access_memory"],
+        endpoint_url="http://127.0.0.1:9"
+    )
+    platform = system.platforms[platform_id]
+
+    posting = asyncio.Event()
+
+    async def slow_post(platform, payloads):
+        posting.set()
+        await asyncio.sleep(60)
+        return True
+
+    system._post_sync = slow_post
+    operation = SyncOperation(
+        operation_id="op-1",
+        data_id="data-1",
+        operation_type="update",
+        source_platform="src",
+        target_platforms=[platform_id],
+        status=SyncStatus.PENDING,
+        created_at=None,
+        updated_at=None
+    )
+
+    sync = asyncio.create_task(system._sync_via_http(operation, platform))
+    await asyncio.wait_for(posting.wait(), 2)
+
+    # 送信中に停止しても、送信中の操作は失敗として終わる
+    system._stop_outbox(platform_id)
+    assert await asyncio.wait_for(sync, 2) is False
+    await system.stop_sync_service()
+
+
+def test_stop_outbox_during_post():
+    """送信中にプラットフォームを停止しても同期が待ち続けない"""
+    asyncio.run(_stop_outbox_during_post())
+
+
+async def _failed_targets_are_retried() -> None:
+    system = _new_system()
+    platform_ids = [
+        await system.register_platform(
+            PlatformType.DESKTOP_APP, "1.0", ["access_memory"]
+        )
+        for _ in range(3)
+    ]
+    flaky = set(platform_ids[1:])
+    calls = []
+
+    async def sync_to_platform(operation, platform):
+        calls.append(platform.platform_id)
+        if platform.platform_id in flaky:
+            flaky.discard(platform.platform_id)
+            return False
+        return True
+
+    system._sync_to_platform = sync_to_platform
+    operation_id = await system._create_sync_operation(
+        "data-1", "update", "src", platform_ids
+    )
+    operation = system.sync_operations[operation_id]
+
+    # 2件失敗しても1回の試行として数え、リトライヒープに積まれる
+    await system._execute_sync_operation(operation_id)
+    assert operation.status == SyncStatus.FAILED
+    assert operation.retry_count == 1
+    assert [op_id for _, op_id in system._retry_heap] == [operation_id]
+
+    # リトライでは失敗したターゲットだけに再送して完了する
+    await system._retry_failed_operations(now=float("inf"))
+    await asyncio.wait_for(system._sync_queue.join(), 2)
+    assert operation.status == SyncStatus.COMPLETED
+    assert operation.retry_count == 1
+    assert sorted(calls[3:]) == sorted(platform_ids[1:])
+    assert operation_id not in system._retry_targets
+    await system.stop_sync_service()
+
+
+def test_failed_targets_are_retried():
+    """同期に失敗したターゲットがバックオフ後に再送される"""
+    asyncio.run(_failed_targets_are_retried())
+
+
+async def _get_data_returns_copy() -> None:
+    system = _new_system()
+    platform_id = await system.register_platform(
+        PlatformType.DESKTOP_APP, "1.0", ["access_memory"]
+    )
+    data_id = await system.sync_data(
+        DataType.MEMORY, {"k": 1, "items": [1, 2]}, platform_id, []
+    )
+    assert not system.sync_data_store[data_id].encrypt_at_rest
+
+    # 平文で保持していても、取得した内容の変更は保持中のデータに及ばない
+    data = await system.get_data(data_id, platform_id)
+    data["content"]["k"] = 999
+    data["content"]["items"].append(3)
+    data = await system.get_data(data_id, platform_id)
+    assert data["content"] == {"k": 1, "items": [1, 2]}
+    await system.stop_sync_service()
+
+
+def test_get_data_returns_copy():
+    """取得したデータを変更しても保持中のデータが変わらない"""
+    asyncio.run(_get_data_returns_copy())
+
+
+async def _sync_receiver(received: list) -> web.AppRunner:
+    """/sync だけを受け付ける従来の受信側を起動"""
+    async def sync(request):
+        received.append((await request.json())["operation_id"])
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post("/sync", sync)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def _burst_to_single_sync_receiver() -> None:
+    received = []
+    runner = await _sync_receiver(received)
+    port = runner.addresses[0][1]
+    system = _new_system()
+    await system.start_sync_service()
+
+    for capabilities in (["access_memory"], ["access_memory", "sync_batch"]):
+        received.clear()
+        platform_id = await system.register_platform(
+            PlatformType.MOBILE_APP, "1.0", capabilities,
+            endpoint_url=f"http://127.0.0.1:{port}"
+        )
+        platform = system.platforms[platform_id]
+        operations = [
+            SyncOperation(
+                operation_id=f"op-{i}",
+                data_id=f"data-{i}",
+                operation_type="update",
+                source_platform="src",
+                target_platforms=[platform_id],
+                status=SyncStatus.PENDING,
+                created_at=None,
+                updated_at=None
+            )
+            for i in range(3)
+        ]
+
+        # まとめて積まれても、バッチ非対応の受信側へ1件ずつ届く
+        results = await asyncio.wait_for(asyncio.gather(*[
+            system._sync_via_http(operation, platform)
+            for operation in operations
+        ]), 5)
+        assert results == [True, True, True]
+        assert sorted(received) == ["op-0", "op-1", "op-2"]
+
+    await system.stop_sync_service()
+    await runner.cleanup()
+
+
+def test_burst_to_single_sync_receiver():
+    """/sync/batch のない受信側にも連続した同期が届く"""
+    asyncio.run(_burst_to_single_sync_receiver())
+
+
+async def _stop_requeues_running_operation() -> None:
+    system = _new_system()
+    await system.start_sync_service()
+    platform_id = await system.register_platform(
+        PlatformType.DESKTOP_APP, "1.0", ["access_memory"]
+    )
+    syncing = asyncio.Event()
+    calls = []
+
+    async def sync_to_platform(operation, platform):
+        calls.append(operation.operation_id)
+        if len(calls) == 1:
+            syncing.set()
+            await asyncio.sleep(60)
+        return True
+
+    system._sync_to_platform = sync_to_platform
+    operation_id = await system._create_sync_operation(
+        "data-1", "update", "src", [platform_id]
+    )
+    await system._enqueue_sync_operation(operation_id)
+    await asyncio.wait_for(syncing.wait(), 2)
+
+    # 実行中に停止した操作は PENDING に戻り、再開時に実行し直される
+    await system.stop_sync_service()
+    operation = system.sync_operations[operation_id]
+    assert operation.status == SyncStatus.PENDING
+    assert operation_id in system._pending_ops
+
+    await system.start_sync_service()
+    await asyncio.wait_for(system._sync_queue.join(), 2)
+    assert operation.status == SyncStatus.COMPLETED
+    assert calls == [operation_id, operation_id]
+    await system.stop_sync_service()
+
+
+def test_stop_requeues_running_operation():
+    """停止で中断された同期操作が再開時に実行される"""
+    asyncio.run(_stop_requeues_running_operation())
+
+
+if __name__ == "__main__":
+    tests = [
+        test_stop_outbox_during_post,
+        test_failed_targets_are_retried,
+        test_get_data_returns_copy,
+        test_burst_to_single_sync_receiver,
+        test_stop_requeues_running_operation,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""統合設定管理(ConfigurationManager)のテスト"""
+
+import asyncio
+import base64
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+import orjson
+
+from aoi.integration.cross_platform_system import PlatformType
+from aoi.integration.integration_config import (
+    ConfigurationManager,
+    PlatformCredentials,
+)
+
+
+async def _new_manager(config_dir=None) -> ConfigurationManager:
+    """設定管理を作成して初期化"""
+    manager = ConfigurationManager(config_dir or tempfile.mkdtemp())
+    await manager.initialize()
+    return manager
+
+
+async def _change_during_flush_is_written() -> None:
+    manager = await _new_manager()
+    rule = (await manager.get_sync_rules(enabled_only=False))[0]
+
+    saving = asyncio.Event()
+    release = asyncio.Event()
+    save_settings = manager._save_settings
+
+    async def slow_save_settings():
+        saving.set()
+        await release.wait()
+        await save_settings()
+
+    manager._save_settings = slow_save_settings
+    await manager.update_settings(sync_interval=99)
+    await asyncio.wait_for(saving.wait(), 2)
+
+    # 設定の書き出し中に同期ルールを変更する
+    await manager.update_sync_rule(rule.id, name="renamed")
+    release.set()
+    await asyncio.wait_for(manager._flush_task, 2)
+
+    assert not manager._dirty
+    rules = orjson.loads(manager.sync_rules_file.read_bytes())
+    assert {r["id"]: r["name"] for r in rules}[rule.id] == "renamed"
+
+
+def test_change_during_flush_is_written():
+    """書き出し中の変更も書き出される"""
+    asyncio.run(_change_during_flush_is_written())
+
+
+async def _failed_save_stays_dirty() -> None:
+    manager = await _new_manager()
+    save_settings = manager._save_settings
+    attempts = []
+
+    async def failing_save_settings():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+        await save_settings()
+
+    manager._save_settings = failing_save_settings
+    await manager.update_settings(sync_interval=42)
+    try:
+        await manager.flush()
+    except OSError:
+        pass
+    assert manager._dirty == {"settings"}
+
+    await manager.close()
+    assert not manager._dirty
+    settings = orjson.loads(manager.settings_file.read_bytes())
+    assert settings["sync_interval"] == 42
+
+
+def test_failed_save_stays_dirty():
+    """保存に失敗したセクションは未保存のまま残り、次の書き出しで保存される"""
+    asyncio.run(_failed_save_stays_dirty())
+
+
+async def _uninitialized_manager_reads_settings() -> None:
+    manager = ConfigurationManager(tempfile.mkdtemp())
+
+    # initialize() 前でも設定を遅延読み込みして動作する
+    assert await manager.get_platform_config(PlatformType.BROWSER) == {}
+    await manager.update_platform_config(PlatformType.BROWSER, {"a": 1})
+    assert await manager.get_platform_config(PlatformType.BROWSER) == {
+        "a": 1
+    }
+    status = await manager.get_status()
+    assert status["user_id"] == manager.settings.user_id
+    exported = await manager.export_config()
+    assert exported["settings"]["custom_settings"] == {
+        "platform_browser": {"a": 1}
+    }
+    await manager.close()
+
+
+def test_uninitialized_manager_reads_settings():
+    """initialize() 前の設定管理でも設定を参照・更新できる"""
+    asyncio.run(_uninitialized_manager_reads_settings())
+
+
+async def _lazy_load_racing_import() -> None:
+    config_dir = tempfile.mkdtemp()
+    await (await _new_manager(config_dir)).close()
+    other = await _new_manager()
+    imported = (await other.export_config())["sync_rules"][:1]
+    await other.close()
+
+    manager = await _new_manager(config_dir)
+    loading = asyncio.Event()
+    release = asyncio.Event()
+    load_sync_rules = manager._load_sync_rules
+
+    async def slow_load_sync_rules():
+        loading.set()
+        await release.wait()
+        await load_sync_rules()
+
+    manager._load_sync_rules = slow_load_sync_rules
+
+    # ファイルからの遅延読み込み中にインポートする
+    reader = asyncio.create_task(manager.get_sync_rules(enabled_only=False))
+    await asyncio.wait_for(loading.wait(), 2)
+    importer = asyncio.create_task(manager.import_config({
+        "sync_rules": imported
+    }))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.wait_for(asyncio.gather(reader, importer), 2)
+
+    rules = await manager.get_sync_rules(enabled_only=False)
+    assert [rule.id for rule in rules] == [imported[0]["id"]]
+    await manager.close()
+
+
+def test_lazy_load_racing_import():
+    """遅延読み込みと同時のインポートでファイルのルールが混ざらない"""
+    asyncio.run(_lazy_load_racing_import())
+
+
+async def _lazy_credentials_on_uninitialized_manager() -> None:
+    config_dir = tempfile.mkdtemp()
+    manager = await _new_manager(config_dir)
+    await manager.store_credentials(PlatformCredentials(
+        PlatformType.BROWSER, "b1", "api_key", {"key": "secret"}
+    ))
+    await manager.close()
+
+    # initialize() 前の初回アクセスでも鍵を読み込んで復号する
+    manager = ConfigurationManager(config_dir)
+    cred = await manager.get_credentials(PlatformType.BROWSER, "b1")
+    assert cred.credentials == {"key": "secret"}
+
+
+def test_lazy_credentials_on_uninitialized_manager():
+    """initialize() 前でも認証情報を復号して遅延読み込みする"""
+    asyncio.run(_lazy_credentials_on_uninitialized_manager())
+
+
+async def _legacy_fernet_credentials_are_migrated() -> None:
+    config_dir = tempfile.mkdtemp()
+    manager = await _new_manager(config_dir)
+    fernet = manager._fernet
+    await manager.close()
+
+    # 旧形式: 値ごとの Fernet トークンと、Fernet でまとめた blob
+    manager.credentials_file.write_bytes(orjson.dumps([
+        {
+            "platform_type": "browser",
+            "platform_id": "b1",
+            "auth_type": "api_key",
+            "credentials": {
+                "key": fernet.encrypt(b"secret").decode()
+            },
+        },
+        {
+            "platform_type": "obsidian",
+            "platform_id": "o1",
+            "auth_type": "api_key",
+            "credentials": {},
+            "credentials_blob": fernet.encrypt(
+                orjson.dumps({"token": "vault"})
+            ).decode(),
+        },
+    ]))
+
+    manager = await _new_manager(config_dir)
+    cred = await manager.get_credentials(PlatformType.BROWSER, "b1")
+    assert cred.credentials == {"key": "secret"}
+    cred = await manager.get_credentials(PlatformType.OBSIDIAN, "o1")
+    assert cred.credentials == {"token": "vault"}
+
+    # 次の保存で AES-GCM の blob に書き換わる
+    await manager.store_credentials(PlatformCredentials(
+        PlatformType.RAYCAST, "r1", "api_key", {"key": "new"}
+    ))
+    await manager.close()
+
+    records = {
+        r["platform_id"]: r
+        for r in orjson.loads(manager.credentials_file.read_bytes())
+    }
+    for platform_id, expected in (
+        ("b1", {"key": "secret"}),
+        ("o1", {"token": "vault"}),
+    ):
+        record = records[platform_id]
+        assert record["credentials"] == {}
+        blob = base64.b64decode(record["credentials_blob"])
+        assert orjson.loads(
+            manager.decrypt_bytes(blob, platform_id.encode())
+        ) == expected
+
+
+def test_legacy_fernet_credentials_are_migrated():
+    """旧形式の Fernet 認証情報を復号し、保存時に AES-GCM へ移行する"""
+    asyncio.run(_legacy_fernet_credentials_are_migrated())
+
+
+async def _cleanup_expired_credentials() -> None:
+    manager = await _new_manager()
+    past = datetime.now() - timedelta(hours=1)
+    future = datetime.now() + timedelta(hours=1)
+
+    def credentials(platform_id, expires_at):
+        return PlatformCredentials(
+            PlatformType.BROWSER, platform_id, "api_key",
+            {"key": platform_id}, expires_at=expires_at
+        )
+
+    await manager.store_credentials(credentials("expired", past))
+    await manager.store_credentials(credentials("renewed", past))
+    await manager.store_credentials(credentials("permanent", None))
+    # 期限を延ばして再登録すると、古いヒープ項目は無視される
+    await manager.store_credentials(credentials("renewed", future))
+
+    assert await manager.cleanup_expired_credentials() == 1
+    assert await manager.get_credentials(
+        PlatformType.BROWSER, "expired"
+    ) is None
+    for platform_id in ("renewed", "permanent"):
+        assert await manager.get_credentials(
+            PlatformType.BROWSER, platform_id
+        ) is not None
+    assert manager._expiry_heap == [(future, "browser_renewed")]
+    assert await manager.cleanup_expired_credentials() == 0
+    await manager.close()
+
+
+def test_cleanup_expired_credentials():
+    """期限切れの認証情報だけを削除し、再登録で延長したものは残す"""
+    asyncio.run(_cleanup_expired_credentials())
+
+
+async def _failed_debounced_flush_is_retried() -> None:
+    manager = await _new_manager()
+    save_settings = manager._save_settings
+    attempts = []
+
+    async def failing_save_settings():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+        await save_settings()
+
+    manager._save_settings = failing_save_settings
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("aoi.integration.integration_config")
+    logger.addHandler(handler)
+    try:
+        with mock.patch(
+            "aoi.integration.integration_config._FLUSH_DELAY", 0.01
+        ):
+            await manager.update_settings(sync_interval=42)
+            # 遅延書き出しの失敗はログに残り、次の変更を待たずに再試行される
+            await asyncio.wait_for(manager._flush_task, 2)
+    finally:
+        logger.removeHandler(handler)
+
+    assert len(attempts) == 2
+    assert [r.levelno for r in records] == [logging.ERROR]
+    assert not manager._dirty
+    settings = orjson.loads(manager.settings_file.read_bytes())
+    assert settings["sync_interval"] == 42
+    await manager.close()
+
+
+def test_failed_debounced_flush_is_retried():
+    """遅延書き出しに失敗したセクションはログを残して再試行される"""
+    asyncio.run(_failed_debounced_flush_is_retried())
+
+
+if __name__ == "__main__":
+    tests = [
+        test_change_during_flush_is_written,
+        test_failed_save_stays_dirty,
+        test_uninitialized_manager_reads_settings,
+        test_lazy_load_racing_import,
+        test_lazy_credentials_on_uninitialized_manager,
+        test_legacy_fernet_credentials_are_migrated,
+        test_cleanup_expired_credentials,
+        test_failed_debounced_flush_is_retried,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""作業継続システム(TaskContinuationSystem)のテスト"""
+
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import orjson
+
+from aoi.continuity.task_continuation_system import (
+    TaskContinuationSystem,
+    TaskStatus,
+)
+
+
+def _baseline_task(task_id: str, status: str, updated_at: datetime) -> dict:
+    """従来形式(version なし)の状態ファイルの内容"""
+    return {
+        "task_id": task_id,
+        "title": "従来のタスク",
+        "description": "version を持たない状態ファイル",
+        "status": status,
+        "current_step_index": 1,
+        "created_at": (updated_at - timedelta(minutes=5)).isoformat(),
+        "updated_at": updated_at.isoformat(),
+        "context": {"owner": "aoi"},
+        "error_history": [{
+            "timestamp": updated_at.isoformat(),
+            "step_id": "s2",
+            "error_type": "network_error",
+            "error_message": "connection refused",
+            "retry_count": 0
+        }],
+        "recovery_suggestions": ["ネットワーク接続を確認してください。"],
+        "steps": [
+            {
+                "step_id": "s1",
+                "description": "読み込み",
+                "status": "completed",
+                "started_at": updated_at.isoformat(),
+                "completed_at": updated_at.isoformat(),
+                "error_message": None,
+                "error_type": None,
+                "retry_count": 0,
+                "max_retries": 3,
+                "context": {"operation": "read", "file_path": "a.txt"}
+            },
+            {
+                "step_id": "s2",
+                "description": "送信",
+                "status": "failed",
+                "started_at": updated_at.isoformat(),
+                "completed_at": None,
+                "error_message": "connection refused",
+                "error_type": "network_error",
+                "retry_count": 1,
+                "max_retries": 3,
+                "context": {}
+            },
+        ],
+    }
+
+
+def _write_baseline_task(state_dir: Path, task: dict) -> None:
+    (state_dir / f"{task['task_id']}.json").write_bytes(orjson.dumps(task))
+
+
+async def _save_load_round_trip() -> None:
+    state_dir = tempfile.mkdtemp()
+    system = TaskContinuationSystem(state_dir)
+    created = await system.create_task("t1", "タイトル", "説明", [
+        {"id": "s1", "description": "読み込み",
+         "context": {"operation": "read", "file_path": "a.txt"}},
+        {"id": "s2", "description": "既定", "max_retries": 5},
+    ])
+    await system.shutdown()
+
+    system = TaskContinuationSystem(state_dir)
+    loaded = await system.get_task_status("t1")
+    assert loaded.title == created.title
+    assert loaded.status == TaskStatus.PENDING
+    assert loaded.created_at == created.created_at
+    assert loaded.updated_at == created.updated_at
+    assert loaded.version == created.version
+    assert [s.step_id for s in loaded.steps] == ["s1", "s2"]
+    assert loaded.steps[0].context == created.steps[0].context
+    assert loaded.steps[1].max_retries == 5
+    await system.shutdown()
+
+
+def test_save_load_round_trip():
+    """保存したタスクを別のインスタンスで読み込める"""
+    asyncio.run(_save_load_round_trip())
+
+
+async def _load_baseline_format() -> None:
+    state_dir = Path(tempfile.mkdtemp())
+    updated_at = datetime(2024, 1, 2, 3, 4, 5)
+    _write_baseline_task(
+        state_dir, _baseline_task("old", "failed", updated_at)
+    )
+
+    system = TaskContinuationSystem(str(state_dir))
+    task = await system.get_task_status("old")
+    assert task.status == TaskStatus.FAILED
+    assert task.version == 0
+    assert task.updated_at == updated_at
+    assert task.context == {"owner": "aoi"}
+    # 状態ファイル内のエラー履歴も読み込む
+    assert [e["step_id"] for e in task.error_history] == ["s2"]
+    assert task.steps[0].status == TaskStatus.COMPLETED
+    assert task.steps[1].error_type.value == "network_error"
+    assert task.steps[1].retry_count == 1
+    await system.shutdown()
+
+
+def test_load_baseline_format():
+    """version を持たない従来形式の状態ファイルを読み込める"""
+    asyncio.run(_load_baseline_format())
+
+
+async def _list_tasks_through_index() -> None:
+    state_dir = Path(tempfile.mkdtemp())
+    system = TaskContinuationSystem(str(state_dir))
+    for task_id in ("a", "b", "c"):
+        await system.create_task(task_id, task_id, "", [])
+    for task_id in ("a", "c"):
+        await system.execute_task(task_id)
+    await system.shutdown()
+
+    # 索引に未登録のファイルは初回の一覧取得で取り込まれる
+    _write_baseline_task(state_dir, _baseline_task(
+        "old", "completed", datetime.now() + timedelta(hours=1)
+    ))
+
+    system = TaskContinuationSystem(str(state_dir))
+    tasks = await system.list_tasks()
+    assert [t.task_id for t in tasks] == ["old", "c", "a", "b"]
+    assert "old" in system._index.task_ids()
+
+    completed = await system.list_tasks(TaskStatus.COMPLETED, limit=2)
+    assert [t.task_id for t in completed] == ["old", "c"]
+    pending = await system.list_tasks(TaskStatus.PENDING)
+    assert [t.task_id for t in pending] == ["b"]
+    await system.shutdown()
+
+
+def test_list_tasks_through_index():
+    """索引から絞り込み・更新日時の新しい順に一覧を取得する"""
+    asyncio.run(_list_tasks_through_index())
+
+
+async def _failing_step_stops_after_max_retries() -> None:
+    system = TaskContinuationSystem(tempfile.mkdtemp())
+    await system.create_task("t1", "失敗するタスク", "", [
+        {"id": "s1", "description": "常に失敗", "max_retries": 2},
+    ])
+    attempts = []
+
+    async def failing_step(step):
+        attempts.append(step.retry_count)
+        raise ConnectionError("connection refused")
+
+    system._execute_default_step = failing_step
+    # バックオフの待機を省く
+    with mock.patch(
+        "aoi.continuity.task_continuation_system.random.uniform",
+        return_value=0
+    ):
+        task = await asyncio.wait_for(system.execute_task("t1"), 5)
+
+    assert task.status == TaskStatus.FAILED
+    assert attempts == [0, 1, 2]
+    step = task.steps[0]
+    assert step.status == TaskStatus.FAILED
+    assert step.retry_count == 2
+    assert [e["retry_count"] for e in system.iter_error_history("t1")] == [
+        0, 1, 2
+    ]
+    await system.shutdown()
+
+
+def test_failing_step_stops_after_max_retries():
+    """失敗し続けるステップは max_retries 回のリトライ後にタスクを失敗させる"""
+    asyncio.run(_failing_step_stops_after_max_retries())
+
+
+def _slow_checkpoint_writes(system: TaskContinuationSystem) -> list:
+    """途中経過の書き込みを遅くし、書き込みで起きた例外を記録する"""
+    errors = []
+    write_state = system._write_state
+
+    def slow_write_state(state_file, payload, status, updated_at):
+        if status == TaskStatus.IN_PROGRESS.value:
+            time.sleep(0.3)
+        try:
+            write_state(state_file, payload, status, updated_at)
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    system._write_state = slow_write_state
+    return errors
+
+
+async def _checkpoint_does_not_overwrite_final_state() -> None:
+    state_dir = tempfile.mkdtemp()
+    system = TaskContinuationSystem(state_dir)
+    errors = _slow_checkpoint_writes(system)
+    task = await system.create_task("t0", "タイトル", "", [
+        {"id": "s1", "description": "既定"},
+    ])
+
+    async def step_with_checkpoint(step):
+        # 実行中の状態をチェックポイントとして書き出させる
+        system._dirty[task.task_id] = task
+        asyncio.create_task(system.flush())
+        await asyncio.sleep(0.05)
+
+    system._execute_default_step = step_with_checkpoint
+    assert (await system.execute_task("t0")).status == TaskStatus.COMPLETED
+    await system.shutdown()
+    # 遅れて終わる書き込みがあれば、その結果も含めて確かめる
+    await asyncio.sleep(0.4)
+    assert not errors
+
+    system = TaskContinuationSystem(state_dir)
+    assert (await system.get_task_status("t0")).status == (
+        TaskStatus.COMPLETED
+    )
+    assert system._index.query(TaskStatus.COMPLETED.value) == ["t0"]
+    await system.shutdown()
+
+
+def test_checkpoint_does_not_overwrite_final_state():
+    """遅いチェックポイントが最終状態を古い状態で上書きしない"""
+    asyncio.run(_checkpoint_does_not_overwrite_final_state())
+
+
+async def _shutdown_waits_for_writes() -> None:
+    system = TaskContinuationSystem(
+        tempfile.mkdtemp(), checkpoint_interval=0.01
+    )
+    errors = _slow_checkpoint_writes(system)
+    task = await system.create_task("t0", "タイトル", "", [])
+    task.status = TaskStatus.IN_PROGRESS
+    system._mark_dirty(task)
+    await asyncio.sleep(0.1)
+
+    # 定期フラッシュの書き込み中に停止しても索引への書き込みが失敗しない
+    await system.shutdown()
+    await asyncio.sleep(0.4)
+    assert not errors
+
+
+def test_shutdown_waits_for_writes():
+    """停止時は書き込み中の保存が終わってから索引を閉じる"""
+    asyncio.run(_shutdown_waits_for_writes())
+
+
+async def _overlapping_writes() -> None:
+    state_dir = Path(tempfile.mkdtemp())
+    system = TaskContinuationSystem(str(state_dir))
+    task = await system.create_task("t0", "タイトル", "", [])
+    state_file = state_dir / "t0.json"
+    payload = state_file.read_bytes()
+
+    # 同じタスクの書き込みが重なっても一時ファイルを壊し合わない
+    await asyncio.gather(*[
+        asyncio.to_thread(
+            system._write_state, state_file, payload,
+            task.status.value, task.updated_at.isoformat()
+        )
+        for _ in range(50)
+    ])
+    assert orjson.loads(state_file.read_bytes())["task_id"] == "t0"
+    assert not list(state_dir.glob("*.tmp"))
+    await system.shutdown()
+
+
+def test_overlapping_writes():
+    """重なった書き込みがそれぞれ別の一時ファイルを使う"""
+    asyncio.run(_overlapping_writes())
+
+
+if __name__ == "__main__":
+    tests = [
+        test_save_load_round_trip,
+        test_load_baseline_format,
+        test_list_tasks_through_index,
+        test_failing_step_stops_after_max_retries,
+        test_checkpoint_does_not_overwrite_final_state,
+        test_shutdown_waits_for_writes,
+        test_overlapping_writes,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")